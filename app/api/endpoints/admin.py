@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends
+from app.core.security import require_admin
+from app.core.profiling import SlowestTraces
+from app.core.inference_scheduler import inference_scheduler
+from app.core.config import settings
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+# Slowest profiled requests of this worker (each uvicorn worker keeps its own)
+profile_store = SlowestTraces(capacity=settings.PROFILE_MAX_TRACES)
+
+
+@router.get("/profiles")
+async def get_profiles():
+    """Return the slowest profiled requests, slowest first."""
+    traces = profile_store.snapshot()
+    return {"total": len(traces), "traces": traces}
+
+
+@router.delete("/profiles")
+async def clear_profiles():
+    """Clear the collected request profiles."""
+    profile_store.clear()
+    return {"success": True}
+
+
+@router.get("/scheduler")
+async def get_scheduler_state():
+    """Current inference queue depth per priority class (wait times are in /metrics)."""
+    return {"queue_depths": inference_scheduler.queue_depths()}
@@ -1,10 +1,14 @@
 from fastapi import APIRouter, HTTPException, status, Depends, Body
+from fastapi.responses import ORJSONResponse
 from app.features.search.schemas import (
     SearchRequest, SearchResponse, 
     SyncLearningPathRequest, SyncResponse,
     BulkSyncRequest, BulkSyncResponse
 )
 from app.features.search.service import SearchService
+from app.core.deadline import DeadlineExceeded
+from app.core.metrics import BATCH_SIZE
+from app.core.inference_scheduler import INTERACTIVE, inference_scheduler
 import logging
 
 logger = logging.getLogger(__name__)
@@ -24,7 +28,7 @@ async def initialize_collections(service: SearchService = Depends()):
             detail=f"Initialization failed: {str(e)}"
         )
 
-@router.post("/", response_model=SearchResponse)
+@router.post("/", response_model=SearchResponse, response_class=ORJSONResponse)
 async def search_learning_paths(
     request: SearchRequest,
     service: SearchService = Depends()
@@ -36,9 +40,13 @@ async def search_learning_paths(
             query=request.query, 
             top_k=request.top_k,
             filters=request.filters,
-            resource_type=request.resource_type or "learning_paths"
+            resource_type=request.resource_type or "learning_paths",
+            payload_fields=request.payload_fields
         )
-        return response
+        # Returned as a Response so FastAPI skips re-validating every result through SearchResponse
+        return ORJSONResponse(content=response)
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(e))
     except Exception as e:
         logger.error(f"Search error: {e}")
         raise HTTPException(
@@ -49,7 +57,7 @@ async def search_learning_paths(
 @router.post("/embed")
 async def embed_text(text: str = Body(..., embed=True), service: SearchService = Depends()):
     """Generate embedding vector from input text."""
-    vector = service.embedding.generate_vector(text)
+    vector = await inference_scheduler.run(INTERACTIVE, service.embedding.generate_vector, text)
     return {"embedding": vector}
 
 @router.post("/sync", response_model=SyncResponse)
@@ -91,22 +99,34 @@ async def bulk_sync_learning_paths(
     errors = []
     
     logger.info(f"Bulk syncing {total} learning paths to Qdrant")
-    
-    for path_request in request.learning_paths:
-        try:
-            await service.sync_upsert(
-                collection_name=request.collection_name,
-                path_id=path_request.path_id,
-                title=path_request.title,
-                description=path_request.description,
-                metadata=path_request.metadata
-            )
-            succeeded += 1
-        except Exception as e:
-            failed += 1
-            error_msg = f"Failed to sync path_id {path_request.path_id}: {str(e)}"
-            errors.append(error_msg)
-            logger.error(error_msg)
+    BATCH_SIZE.labels(operation="bulk_sync").observe(total)
+
+    # Bounded batches keep each Qdrant upsert small; only a failed batch is retried
+    async for batch, vectors, batch_error in service.sync_upsert_batches(
+        request.collection_name, request.learning_paths
+    ):
+        if batch_error is None:
+            succeeded += len(batch)
+            continue
+        # Retry one by one so each failing path is reported individually
+        logger.warning(f"Batch sync failed, retrying {len(batch)} paths one by one: {batch_error}")
+        for i, path_request in enumerate(batch):
+            try:
+                await service.sync_upsert(
+                    collection_name=request.collection_name,
+                    path_id=path_request.path_id,
+                    title=path_request.title,
+                    description=path_request.description,
+                    metadata=path_request.metadata,
+                    # Only re-encode when the batch's encode itself failed
+                    vector=vectors[i] if vectors is not None else None
+                )
+                succeeded += 1
+            except Exception as e:
+                failed += 1
+                error_msg = f"Failed to sync path_id {path_request.path_id}: {str(e)}"
+                errors.append(error_msg)
+                logger.error(error_msg)
     
     return BulkSyncResponse(
         success=(failed == 0),
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, status
-from app.core.config import settings
-from app.core.redis import redis_client
-from app.core.vector_database import qdrant_client
-from app.api.endpoints import recommend, reflection, search
+from fastapi import APIRouter, Depends, status
+from fastapi.responses import JSONResponse
+from app.core.health import health_monitor
+from app.core.rate_limit import rate_limiter
+from app.features.search.service import query_warmup
+from app.api.endpoints import admin, recommend, reflection, search
 import logging
 
 logger = logging.getLogger(__name__)
@@ -19,58 +20,59 @@ def root():
         "docs": "/docs"
     }
 
-# Health check endpoint
+# Health check endpoints: served from state cached by the background health monitor
 @api_router.get("/health")
-def health_check():
+async def health_check():
+    healthy, details = health_monitor.snapshot()
     health_status = {
-        "status": "healthy",
+        "status": "healthy" if healthy else "degraded",
         "service": "AI Inference Engine",
         "version": "1.0.0",
-        "dependencies": {}
+        **details
     }
-    all_healthy = True
-    # Check Redis connection
-    try:
-        redis_client.ping()
-        health_status["dependencies"]["redis"] = "connected"
-    except Exception as e:
-        health_status["dependencies"]["redis"] = f"disconnected: {str(e)}"
-        all_healthy = False
-        logger.error(f"Redis health check failed: {e}")
-    # Check Qdrant connection
-    try:
-        qdrant_client.get_collections()
-        health_status["dependencies"]["qdrant"] = "connected"
-    except Exception as e:
-        health_status["dependencies"]["qdrant"] = f"disconnected: {str(e)}"
-        all_healthy = False
-        logger.error(f"Qdrant health check failed: {e}")
-    # Check Groq API Key
-    if settings.GROQ_API_KEY:
-        health_status["dependencies"]["groq_api"] = "configured"
-    else:
-        health_status["dependencies"]["groq_api"] = "not_configured"
-        all_healthy = False
-    if not all_healthy:
-        health_status["status"] = "degraded"
-        return health_status, status.HTTP_503_SERVICE_UNAVAILABLE
+    if not healthy:
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=health_status)
     return health_status
 
+@api_router.get("/health/live")
+async def liveness():
+    """Process is up and the event loop is responsive."""
+    return {"status": "alive"}
+
+@api_router.get("/health/ready")
+async def readiness():
+    """Dependencies are reachable, the embedding model is loaded and warm-up has finished."""
+    healthy, details = health_monitor.snapshot()
+    ready = healthy and details["embedding_model"] == "loaded" and query_warmup.finished
+    content = {"status": "ready" if ready else "not_ready", **details, "warmup": query_warmup.progress()}
+    if not ready:
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=content)
+    return content
+
 # Include routers from different endpoints
 api_router.include_router(
     recommend.router,
     prefix="/recommend",
-    tags=["Recommendation"]
+    tags=["Recommendation"],
+    dependencies=[Depends(rate_limiter)]
 )
 
 api_router.include_router(
     reflection.router,
     prefix="/reflection",
-    tags=["Reflection & Sentiment Analysis"]
+    tags=["Reflection & Sentiment Analysis"],
+    dependencies=[Depends(rate_limiter)]
 )
 
 api_router.include_router(
     search.router,
     prefix="/search",
-    tags=["Search"]
+    tags=["Search"],
+    dependencies=[Depends(rate_limiter)]
+)
+
+api_router.include_router(
+    admin.router,
+    prefix="/admin",
+    tags=["Admin"]
 )
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import Optional
+from typing import Dict, List, Literal, Optional
 
 class Settings(BaseSettings):
     QDRANT_URL: str
@@ -8,6 +8,93 @@ class Settings(BaseSettings):
     GROQ_API_KEY: Optional[str] = None
     REDIS_URL: str = "redis://redis:6379"
 
+    # Request coalescing for identical in-flight searches
+    SINGLEFLIGHT_REDIS_ENABLED: bool = False
+    SINGLEFLIGHT_LOCK_TTL_MS: int = 3000
+    SINGLEFLIGHT_RESULT_TTL_MS: int = 1000
+
+    # How learning paths are embedded: one vector for the whole text ("single"),
+    # the mean of overlapping chunk vectors ("pooled"), or every chunk stored as a
+    # Qdrant multivector scored by its best chunk ("multivector").
+    # Switching to/from "multivector" requires recreating the collection.
+    EMBEDDING_CHUNK_MODE: Literal["single", "pooled", "multivector"] = "single"
+    EMBEDDING_CHUNK_TOKENS: int = 160
+    EMBEDDING_CHUNK_OVERLAP: int = 32
+
+    # Inference scheduling: interactive search always runs before bulk ingestion.
+    # Bulk work is encoded and upserted in batches of INFERENCE_BULK_BATCH_SIZE paths.
+    # While interactive requests are competing it may use at most
+    # INFERENCE_BULK_CPU_SHARE of the inference thread's time (it runs unthrottled on
+    # an idle worker) and, when set, INFERENCE_BULK_THREADS torch threads.
+    INFERENCE_BULK_BATCH_SIZE: int = 16
+    INFERENCE_BULK_CPU_SHARE: float = 0.5
+    INFERENCE_BULK_THREADS: Optional[int] = None
+    INFERENCE_INTERACTIVE_THREADS: Optional[int] = None
+
+    # Rate limiting ("N/second|minute|hour|day"). Each client has a bucket per route;
+    # a body user_id adds a bucket nested in it. A client is named by X-Client-Id only
+    # when X-Client-Key matches its secret in RATE_LIMIT_CLIENT_KEYS ({"go-backend":
+    # "<secret>"}), otherwise by its IP, so a backend without a key shares one ip:
+    # bucket for all its users. RATE_LIMIT_ROUTES overrides the default per route
+    # template (e.g. {"/api/v1/search/": "30/minute"}) and RATE_LIMIT_KEYS per client
+    # or user (e.g. {"client:go-backend": "6000/minute", "user:42": "10/minute"}).
+    RATE_LIMIT_ENABLED: bool = False
+    RATE_LIMIT_DEFAULT: str = "120/minute"
+    RATE_LIMIT_ROUTES: Dict[str, str] = {}
+    RATE_LIMIT_KEYS: Dict[str, str] = {}
+    RATE_LIMIT_CLIENT_KEYS: Dict[str, str] = {}
+
+    # Local replica: a memory-mapped copy of these collections on local disk,
+    # served when Qdrant errors or exceeds LOCAL_REPLICA_LATENCY_BUDGET_MS
+    LOCAL_REPLICA_ENABLED: bool = False
+    LOCAL_REPLICA_DIR: str = "/tmp/qdrant-replica"
+    LOCAL_REPLICA_COLLECTIONS: List[str] = ["learning_paths"]
+    LOCAL_REPLICA_REFRESH_INTERVAL: float = 300.0
+    LOCAL_REPLICA_LATENCY_BUDGET_MS: int = 800
+    LOCAL_REPLICA_EXCLUDED_FIELDS: List[str] = ["description"]
+
+    # Per-worker LRU cache of search query embeddings
+    QUERY_EMBEDDING_CACHE_SIZE: int = 2048
+
+    # Sampled log of search queries (Redis sorted set by frequency, halved every
+    # QUERY_LOG_HALF_LIFE_S), replayed on startup to warm the query cache before
+    # the worker reports ready
+    QUERY_LOG_SAMPLE_RATE: float = 0.0
+    QUERY_LOG_MAX_ENTRIES: int = 10000
+    QUERY_LOG_HALF_LIFE_S: float = 86400.0
+    WARMUP_ENABLED: bool = False
+    WARMUP_TOP_N: int = 500
+    WARMUP_BATCH_SIZE: int = 64
+    WARMUP_TIME_BUDGET_S: float = 30.0
+    WARMUP_SEARCH: bool = False
+
+    # Request deadlines: budget from DEADLINE_HEADER (ms, capped at DEADLINE_MAX_MS)
+    # or the longest matching path prefix in DEADLINE_ROUTE_MS, else the default.
+    # Stages with less than DEADLINE_MIN_STAGE_MS left are skipped.
+    DEADLINE_HEADER: str = "X-Request-Timeout-Ms"
+    DEADLINE_DEFAULT_MS: int = 10000
+    DEADLINE_ROUTE_MS: Dict[str, int] = {
+        "/api/v1/search/sync": 300000,
+        "/api/v1/search/init": 60000,
+    }
+    DEADLINE_MAX_MS: int = 300000
+    DEADLINE_MIN_STAGE_MS: int = 20
+
+    # Load the embedding model in the Gunicorn master so forked workers share it
+    PRELOAD_MODEL: bool = True
+
+    # Dependency health checks run in the background; probes read the cached state
+    HEALTH_CHECK_INTERVAL: float = 15.0
+    HEALTH_CHECK_TIMEOUT: float = 3.0
+
+    # Opt-in request profiling (send the header, or sample a fraction of requests)
+    PROFILE_HEADER: str = "X-Profile"
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_MAX_TRACES: int = 20
+
+    # Admin endpoints require this token in X-Admin-Token; they are disabled (404) while unset
+    ADMIN_TOKEN: Optional[str] = None
+
     # การตั้งค่าที่ยืดหยุ่นที่สุดสำหรับทั้ง Local และ Production
     model_config = SettingsConfigDict(
         env_file=".env",
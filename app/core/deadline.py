@@ -0,0 +1,150 @@
+import asyncio
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from app.core.metrics import CLIENT_DISCONNECTS, DEADLINE_EXCEEDED
+
+# Monotonic time by which the current request must be answered; None outside requests
+current_deadline: ContextVar[Optional[float]] = ContextVar("current_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    def __init__(self, stage: str):
+        super().__init__(f"Request deadline exceeded before {stage}")
+        self.stage = stage
+
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current request's budget, or None when there is no deadline."""
+    deadline = current_deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def check(stage: str, min_remaining: float = 0.0):
+    """Raise DeadlineExceeded (and count it) when less than min_remaining seconds are left."""
+    left = remaining()
+    if left is not None and left < min_remaining:
+        DEADLINE_EXCEEDED.labels(stage=stage).inc()
+        raise DeadlineExceeded(stage)
+
+
+def timeout(default: float, stage: str, min_remaining: float = 0.0) -> float:
+    """Adaptive timeout: the fixed default, capped by what is left of the budget."""
+    check(stage, min_remaining)
+    left = remaining()
+    return default if left is None else min(default, left)
+
+
+class DeadlineMiddleware:
+    """Pure ASGI middleware giving every request a time budget.
+
+    The budget comes from the request header (milliseconds, capped by max_ms)
+    or the longest matching route prefix default. Stages read it through
+    `remaining()`/`check()`. The request is cancelled when the client
+    disconnects, and answered with 504 if it runs past the budget.
+    """
+
+    def __init__(
+        self,
+        app,
+        header: str,
+        default_ms: int,
+        route_ms: Dict[str, int],
+        max_ms: int,
+        grace_ms: int = 100
+    ):
+        self.app = app
+        self.header = header.lower().encode("latin-1")
+        self.default_ms = default_ms
+        # Longest prefix first so the most specific route wins
+        self.route_ms = sorted(route_ms.items(), key=lambda item: len(item[0]), reverse=True)
+        self.max_ms = max_ms
+        self.grace = grace_ms / 1000
+
+    def _budget_ms(self, scope) -> int:
+        for name, value in scope["headers"]:
+            if name == self.header:
+                try:
+                    return max(1, min(int(value), self.max_ms))
+                except ValueError:
+                    break
+        for prefix, budget in self.route_ms:
+            if scope["path"].startswith(prefix):
+                return budget
+        return self.default_ms
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        budget = self._budget_ms(scope) / 1000
+        token = current_deadline.set(time.monotonic() + budget)
+        body_done = asyncio.Event()
+        disconnected = asyncio.Event()
+        response_started = False
+
+        async def wrapped_receive():
+            if body_done.is_set():
+                # After the body, only a disconnect can arrive; the watcher owns receive()
+                await disconnected.wait()
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                disconnected.set()
+            elif not message.get("more_body", False):
+                body_done.set()
+            return message
+
+        async def wrapped_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        async def watch_disconnect():
+            await body_done.wait()
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            disconnected.set()
+            app_task.cancel()
+
+        # Tasks copy the current context, so both see the deadline set above
+        app_task = asyncio.create_task(self.app(scope, wrapped_receive, wrapped_send))
+        watcher = asyncio.create_task(watch_disconnect())
+        try:
+            done, _ = await asyncio.wait({app_task}, timeout=budget + self.grace)
+            if app_task in done:
+                if app_task.cancelled():
+                    # Only the disconnect watcher cancels it
+                    CLIENT_DISCONNECTS.inc()
+                    return
+                app_task.result()
+                return
+
+            app_task.cancel()
+            try:
+                await app_task
+            except (asyncio.CancelledError, Exception):
+                pass
+            DEADLINE_EXCEEDED.labels(stage="request").inc()
+            if not response_started and not disconnected.is_set():
+                body = b'{"detail":"Request deadline exceeded"}'
+                await send({
+                    "type": "http.response.start",
+                    "status": 504,
+                    "headers": [
+                        (b"content-type", b"application/json"),
+                        (b"content-length", str(len(body)).encode("latin-1")),
+                    ],
+                })
+                await send({"type": "http.response.body", "body": body})
+        finally:
+            if not app_task.done():
+                # The server cancelled this request (e.g. shutdown)
+                app_task.cancel()
+            watcher.cancel()
+            current_deadline.reset(token)
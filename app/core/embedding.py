@@ -1,18 +1,154 @@
-from sentence_transformers import SentenceTransformer
-from typing import List
+from collections import OrderedDict
+from typing import TYPE_CHECKING, List, Optional, Tuple
+from app.core.config import settings
+from app.core.metrics import CACHE_LOOKUPS, observe_stage
+import asyncio
+import logging
+import threading
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+logger = logging.getLogger(__name__)
 
 class EmbeddingService:
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
-        self.model = SentenceTransformer(model_name)
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", query_cache_size: int = 0):
+        # Imported here: sentence_transformers pulls in torch, which dominates import time
+        from sentence_transformers import SentenceTransformer
+        self.model: "SentenceTransformer" = SentenceTransformer(model_name)
+        self.query_cache_size = query_cache_size
+        self._query_cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._query_cache_lock = threading.Lock()
 
     def generate_vector(self, text: str) -> List[float]:
         """Converts text to a vector locally on your CPU/GPU."""
-        embedding = self.model.encode(text)
+        with observe_stage("encode"):
+            embedding = self.model.encode(text)
         return embedding.tolist()
 
+    def generate_vectors(self, texts: List[str], batch_size: int = 32) -> List[List[float]]:
+        """Converts many texts at once, batching them through the model."""
+        with observe_stage("encode"):
+            embeddings = self.model.encode(texts, batch_size=batch_size)
+        return embeddings.tolist()
+
+    def _cache_query_vector(self, text: str, vector: List[float]):
+        with self._query_cache_lock:
+            self._query_cache[text] = vector
+            self._query_cache.move_to_end(text)
+            while len(self._query_cache) > self.query_cache_size:
+                self._query_cache.popitem(last=False)
+
+    def generate_query_vector(self, text: str) -> List[float]:
+        """generate_vector with a per-worker LRU cache for repeated search queries."""
+        if self.query_cache_size <= 0:
+            return self.generate_vector(text)
+        with self._query_cache_lock:
+            vector = self._query_cache.get(text)
+            if vector is not None:
+                self._query_cache.move_to_end(text)
+        if vector is not None:
+            CACHE_LOOKUPS.labels(cache="query_embedding", result="hit").inc()
+            return vector
+        CACHE_LOOKUPS.labels(cache="query_embedding", result="miss").inc()
+        vector = self.generate_vector(text)
+        self._cache_query_vector(text, vector)
+        return vector
+
+    def warm_query_vectors(self, texts: List[str]) -> int:
+        """Batch-encode queries that are not cached yet into the query cache."""
+        if self.query_cache_size <= 0:
+            return 0
+        with self._query_cache_lock:
+            missing = list(dict.fromkeys(text for text in texts if text not in self._query_cache))
+        if missing:
+            for text, vector in zip(missing, self.generate_vectors(missing)):
+                self._cache_query_vector(text, vector)
+        return len(missing)
+
     def prepare_learning_path_text(self, title: str, description: str) -> str:
         return f"Learning Path Title: {title}. Content Summary: {description}"
 
     def get_path_vector(self, title: str, description: str) -> List[float]:
         combined_text = self.prepare_learning_path_text(title, description)
         return self.generate_vector(combined_text)
+
+    def chunk_text(self, text: str, chunk_tokens: int, overlap: int) -> List[str]:
+        """Splits text into overlapping windows of at most chunk_tokens tokens."""
+        tokenizer = self.model.tokenizer
+        ids = tokenizer(text, add_special_tokens=False)["input_ids"]
+        if len(ids) <= chunk_tokens:
+            return [text]
+
+        step = max(1, chunk_tokens - overlap)
+        chunks = []
+        for start in range(0, len(ids), step):
+            chunks.append(tokenizer.decode(ids[start:start + chunk_tokens]))
+            if start + chunk_tokens >= len(ids):
+                break
+        return chunks
+
+    def get_path_vectors(
+        self,
+        paths: List[Tuple[str, str]],
+        mode: str = "single",
+        chunk_tokens: int = 160,
+        overlap: int = 32
+    ) -> list:
+        """Embeds many (title, description) pairs in one batch.
+
+        "single" returns one vector per path (long descriptions get truncated by
+        the model), "pooled" the normalized mean of its chunk vectors and
+        "multivector" the list of chunk vectors.
+        """
+        if mode == "single":
+            return self.generate_vectors(
+                [self.prepare_learning_path_text(title, description) for title, description in paths]
+            )
+
+        # Chunks of every path go through the model together
+        texts: List[str] = []
+        spans: List[Tuple[int, int]] = []
+        for title, description in paths:
+            chunks = [
+                self.prepare_learning_path_text(title, chunk)
+                for chunk in self.chunk_text(description, chunk_tokens, overlap)
+            ]
+            spans.append((len(texts), len(texts) + len(chunks)))
+            texts.extend(chunks)
+
+        with observe_stage("encode"):
+            embeddings = self.model.encode(texts, batch_size=32)
+
+        vectors = []
+        for start, end in spans:
+            chunk_vectors = embeddings[start:end]
+            if mode == "multivector":
+                vectors.append(chunk_vectors.tolist())
+            else:
+                pooled = chunk_vectors.mean(axis=0)
+                vectors.append((pooled / float((pooled ** 2).sum() ** 0.5)).tolist())
+        return vectors
+
+# Singleton model shared by every request of this worker
+_embedding_service: Optional[EmbeddingService] = None
+_embedding_lock = threading.Lock()
+
+def get_embedding_service() -> EmbeddingService:
+    global _embedding_service
+    if _embedding_service is None:
+        with _embedding_lock:
+            if _embedding_service is None:
+                _embedding_service = EmbeddingService(query_cache_size=settings.QUERY_EMBEDDING_CACHE_SIZE)
+    return _embedding_service
+
+def is_embedding_model_loaded() -> bool:
+    return _embedding_service is not None
+
+async def preload_embedding_model():
+    """Load the model off the event loop so the worker can answer probes meanwhile."""
+    try:
+        await asyncio.to_thread(get_embedding_service)
+        logger.info("Embedding model loaded.")
+    except Exception as e:
+        logger.error(f"Failed to load embedding model: {e}")
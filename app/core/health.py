@@ -0,0 +1,91 @@
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.embedding import is_embedding_model_loaded
+from app.core.redis import get_redis_client
+from app.core.vector_database import get_qdrant_client
+
+logger = logging.getLogger(__name__)
+
+
+class HealthMonitor:
+    """Checks dependencies in the background so probes only read cached state.
+
+    Each worker pings Redis and Qdrant once per interval no matter how often
+    it is probed, and a hung dependency never blocks the event loop.
+    """
+
+    def __init__(self, interval: float, timeout: float):
+        self.interval = interval
+        self.timeout = timeout
+        self.dependencies: Dict[str, str] = {"redis": "unknown", "qdrant": "unknown"}
+        self.checked_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def _check(self, name: str, ping: Callable[[], Any]) -> str:
+        try:
+            await asyncio.wait_for(asyncio.to_thread(ping), timeout=self.timeout)
+            return "connected"
+        except asyncio.TimeoutError:
+            logger.error(f"{name} health check timed out after {self.timeout}s")
+            return "disconnected: timeout"
+        except Exception as e:
+            logger.error(f"{name} health check failed: {e}")
+            return f"disconnected: {str(e)}"
+
+    async def refresh(self):
+        redis_status, qdrant_status = await asyncio.gather(
+            self._check("Redis", lambda: get_redis_client().ping()),
+            self._check("Qdrant", lambda: get_qdrant_client().get_collections())
+        )
+        self.dependencies = {"redis": redis_status, "qdrant": qdrant_status}
+        self.checked_at = time.monotonic()
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Health refresh failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def is_stale(self) -> bool:
+        return self.checked_at is None or time.monotonic() - self.checked_at > 3 * self.interval
+
+    def snapshot(self) -> Tuple[bool, Dict[str, Any]]:
+        """Return (healthy, details) from the last completed refresh."""
+        dependencies = dict(self.dependencies)
+        dependencies["groq_api"] = "configured" if settings.GROQ_API_KEY else "not_configured"
+        healthy = (
+            not self.is_stale()
+            and all(value in ("connected", "configured") for value in dependencies.values())
+        )
+        return healthy, {
+            "dependencies": dependencies,
+            "embedding_model": "loaded" if is_embedding_model_loaded() else "loading",
+            "checked_seconds_ago": (
+                round(time.monotonic() - self.checked_at, 3) if self.checked_at is not None else None
+            ),
+        }
+
+
+health_monitor = HealthMonitor(
+    interval=settings.HEALTH_CHECK_INTERVAL,
+    timeout=settings.HEALTH_CHECK_TIMEOUT
+)
@@ -0,0 +1,134 @@
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from app.core import deadline
+from app.core.config import settings
+from app.core.metrics import DEADLINE_EXCEEDED, INFERENCE_QUEUE_WAIT
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+
+class InferenceScheduler:
+    """Runs model inference on one dedicated thread with two priority classes.
+
+    Interactive jobs always run before queued bulk jobs. A running forward pass
+    cannot be interrupted, so callers split bulk work into small batches and
+    interactive requests get in between them. Bulk jobs can be capped to fewer
+    torch threads and to a share of the scheduler's time while interactive work
+    is competing (bulk_cpu_share=0.5 idles for as long as each bulk batch took
+    when an interactive job was seen within contention_window seconds, and
+    wakes up as soon as one arrives). An idle worker runs bulk work flat out.
+    """
+
+    def __init__(
+        self,
+        bulk_cpu_share: float = 1.0,
+        bulk_threads: Optional[int] = None,
+        interactive_threads: Optional[int] = None,
+        contention_window: float = 2.0
+    ):
+        self.bulk_cpu_share = min(max(bulk_cpu_share, 0.01), 1.0)
+        self.contention_window = contention_window
+        self._last_interactive_at = float("-inf")
+        self.threads = {BULK: bulk_threads, INTERACTIVE: interactive_threads}
+        self._queues: Dict[str, Deque[tuple]] = {
+            INTERACTIVE: deque(),
+            BULK: deque(),
+        }
+        self._cond = threading.Condition()
+        self._bulk_ready_at = 0.0
+        self._thread: Optional[threading.Thread] = None
+        self._default_threads: Optional[int] = None
+        self._current_threads: Optional[int] = None
+
+    def submit(self, priority: str, fn: Callable[..., Any], *args: Any) -> Future:
+        future: Future = Future()
+        with self._cond:
+            # Started on first use so the thread is never created before a fork
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="inference-scheduler", daemon=True)
+                self._thread.start()
+            # Carry the caller's context so profiling traces see the encode stage
+            context = contextvars.copy_context()
+            now = time.monotonic()
+            if priority == INTERACTIVE:
+                self._last_interactive_at = now
+            self._queues[priority].append((future, context, fn, args, now))
+            self._cond.notify()
+        return future
+
+    async def run(self, priority: str, fn: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.wrap_future(self.submit(priority, fn, *args))
+
+    def queue_depths(self) -> Dict[str, int]:
+        with self._cond:
+            return {priority: len(queue) for priority, queue in self._queues.items()}
+
+    def _next_job(self) -> Tuple[str, tuple]:
+        with self._cond:
+            while True:
+                if self._queues[INTERACTIVE]:
+                    return INTERACTIVE, self._queues[INTERACTIVE].popleft()
+                now = time.monotonic()
+                if self._queues[BULK]:
+                    if now >= self._bulk_ready_at:
+                        return BULK, self._queues[BULK].popleft()
+                    # Bulk is throttled: sleep, but wake up for interactive work
+                    self._cond.wait(self._bulk_ready_at - now)
+                else:
+                    self._cond.wait()
+
+    def _set_threads(self, priority: str):
+        if not any(self.threads.values()):
+            # Nothing configured: leave torch's thread count alone
+            return
+        import torch
+        if self._default_threads is None:
+            self._default_threads = torch.get_num_threads()
+            self._current_threads = self._default_threads
+        wanted = self.threads[priority] or self._default_threads
+        if wanted != self._current_threads:
+            # Process-wide, but only this thread runs inference
+            torch.set_num_threads(wanted)
+            self._current_threads = wanted
+
+    def _run(self):
+        while True:
+            priority, (future, context, fn, args, enqueued_at) = self._next_job()
+            if not future.set_running_or_notify_cancel():
+                continue
+            # Don't spend model time on requests whose budget is already gone
+            left = context.run(deadline.remaining)
+            if left is not None and left <= 0:
+                DEADLINE_EXCEEDED.labels(stage="inference_queue").inc()
+                future.set_exception(deadline.DeadlineExceeded("inference"))
+                continue
+            INFERENCE_QUEUE_WAIT.labels(priority=priority).observe(time.monotonic() - enqueued_at)
+            start = time.monotonic()
+            try:
+                self._set_threads(priority)
+                future.set_result(context.run(fn, *args))
+            except BaseException as e:
+                future.set_exception(e)
+            end = time.monotonic()
+            if priority == INTERACTIVE:
+                self._last_interactive_at = end
+            elif self.bulk_cpu_share < 1.0 and end - self._last_interactive_at < self.contention_window:
+                # Only yield CPU while interactive traffic is actually competing for it
+                self._bulk_ready_at = end + (end - start) * (1 / self.bulk_cpu_share - 1)
+
+
+inference_scheduler = InferenceScheduler(
+    bulk_cpu_share=settings.INFERENCE_BULK_CPU_SHARE,
+    bulk_threads=settings.INFERENCE_BULK_THREADS,
+    interactive_threads=settings.INFERENCE_INTERACTIVE_THREADS
+)
@@ -0,0 +1,34 @@
+import os
+from typing import Dict
+
+_SMAPS_FIELDS = {
+    "Rss": "rss_mb",
+    "Pss": "pss_mb",
+    "Shared_Clean": "shared_mb",
+    "Shared_Dirty": "shared_mb",
+    "Private_Clean": "private_mb",
+    "Private_Dirty": "private_mb",
+}
+
+def memory_usage() -> Dict[str, float]:
+    """Memory of this process in MiB.
+
+    On Linux, PSS splits shared pages between the processes that map them, so
+    summing pss_mb over workers gives the real footprint of the container.
+    """
+    usage: Dict[str, float] = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in _SMAPS_FIELDS:
+                    name = _SMAPS_FIELDS[key]
+                    usage[name] = usage.get(name, 0.0) + int(rest.split()[0]) / 1024
+    except OSError:
+        import resource
+        usage["max_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return {name: round(value, 1) for name, value in usage.items()}
+
+def format_memory_usage() -> str:
+    usage = ", ".join(f"{name}={value}" for name, value in memory_usage().items())
+    return f"pid={os.getpid()} {usage}"
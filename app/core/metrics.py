@@ -0,0 +1,166 @@
+import os
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from starlette.responses import Response
+
+from app.core.profiling import record_stage
+
+# With several uvicorn workers, set PROMETHEUS_MULTIPROC_DIR so every worker
+# writes its samples to a shared directory and /metrics aggregates them all.
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"]
+)
+
+STAGE_LATENCY = Histogram(
+    "stage_duration_seconds",
+    "Latency of internal stages (encode, vector_search, upsert, llm_call, cache_lookup)",
+    ["stage"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total",
+    "Cache lookups by cache and result (hit/miss)",
+    ["cache", "result"]
+)
+
+BATCH_SIZE = Histogram(
+    "batch_size",
+    "Number of items processed per batch operation",
+    ["operation"],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+)
+
+INFERENCE_QUEUE_WAIT = Histogram(
+    "inference_queue_wait_seconds",
+    "Time inference jobs wait in the scheduler queue by priority class",
+    ["priority"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+
+RATE_LIMIT_REJECTIONS = Counter(
+    "rate_limit_rejections_total",
+    "Requests rejected with 429 by route and where the decision was made (local/redis)",
+    ["route", "source"]
+)
+
+REPLICA_FALLBACKS = Counter(
+    "local_replica_fallbacks_total",
+    "Searches served from the local replica by reason (error/timeout/deadline)",
+    ["reason"]
+)
+
+_warmup_progress: Optional[Gauge] = None
+
+
+def warmup_progress() -> Gauge:
+    """Created on first use, in the worker running the warm-up.
+
+    With Gunicorn's preload_app the master imports this module and stays
+    alive, so a gauge created at import time would export a master series
+    stuck at 0.
+    """
+    global _warmup_progress
+    if _warmup_progress is None:
+        _warmup_progress = Gauge(
+            "warmup_progress_ratio",
+            "Fraction of recorded queries replayed by the startup warm-up (per worker)",
+            multiprocess_mode="liveall"
+        )
+    return _warmup_progress
+
+WARMUP_QUERIES = Counter(
+    "warmup_queries_total",
+    "Recorded queries replayed by the startup warm-up by path (embed/search)",
+    ["path"]
+)
+
+DEADLINE_EXCEEDED = Counter(
+    "deadline_exceeded_total",
+    "Stages skipped or requests cut short because the request budget ran out",
+    ["stage"]
+)
+
+CLIENT_DISCONNECTS = Counter(
+    "client_disconnects_total",
+    "Requests cancelled because the client disconnected"
+)
+
+OUTBOUND_ERRORS = Counter(
+    "outbound_errors_total",
+    "Errors from outbound calls by target",
+    ["target"]
+)
+
+
+@contextmanager
+def observe_stage(stage: str, target: Optional[str] = None):
+    """Time a block into STAGE_LATENCY and count failures against `target`."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        if target:
+            OUTBOUND_ERRORS.labels(target=target).inc()
+        raise
+    finally:
+        end = time.perf_counter()
+        STAGE_LATENCY.labels(stage=stage).observe(end - start)
+        record_stage(stage, start, end)
+
+
+def metrics_response() -> Response:
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording request latency per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Use the matched route template to keep label cardinality bounded
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            REQUEST_LATENCY.labels(
+                method=scope["method"],
+                route=path,
+                status=str(status_code)
+            ).observe(time.perf_counter() - start)
@@ -1,10 +1,12 @@
 import httpx
 from typing import Any, Dict, Optional
 from fastapi import HTTPException
+from app.core import deadline
 
 class BaseClient:
-    def __init__(self, base_url: str, api_key: Optional[str] = None):
+    def __init__(self, base_url: str, api_key: Optional[str] = None, timeout: float = 30.0):
         self.base_url = base_url
+        self.timeout = timeout
         self.headers = {
             "Content-Type": "application/json",
         }
@@ -19,8 +21,14 @@ class BaseClient:
         params: Optional[Dict[str, Any]] = None
     ) -> Any:
         url = f"{self.base_url.rstrip('/')}/{endpoint.lstrip('/')}"
-        
-        async with httpx.AsyncClient(timeout=30.0) as client:
+
+        # Never wait longer than the caller's remaining request budget
+        try:
+            timeout = deadline.timeout(self.timeout, "outbound_http", min_remaining=0.05)
+        except deadline.DeadlineExceeded as e:
+            raise HTTPException(status_code=504, detail=str(e))
+
+        async with httpx.AsyncClient(timeout=timeout) as client:
             try:
                 response = await client.request(
                     method=method,
@@ -40,6 +48,12 @@ class BaseClient:
                     status_code=e.response.status_code,
                     detail=f"API Error: {e.response.text}"
                 )
+            except httpx.TimeoutException as e:
+                # Timeout ตาม budget ของ request
+                raise HTTPException(
+                    status_code=504,
+                    detail=f"Upstream timeout: {str(e)}"
+                )
             except httpx.RequestError as e:
                 # จัดการ Error ทางเทคนิค (เช่น เน็ตหลุด, Timeout)
                 raise HTTPException(
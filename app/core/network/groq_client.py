@@ -1,5 +1,6 @@
 from app.core.network.base_client import BaseClient
 from app.core.config import settings
+from app.core.metrics import observe_stage
 
 class GroqClient(BaseClient):
     def __init__(self):
@@ -17,8 +18,9 @@ class GroqClient(BaseClient):
         }
         
         # เรียกใช้ _send_request จาก Class แม่ได้เลย
-        return await self._send_request(
-            method="POST",
-            endpoint="/chat/completions",
-            data=payload
-        )
\ No newline at end of file
+        with observe_stage("llm_call", target="groq"):
+            return await self._send_request(
+                method="POST",
+                endpoint="/chat/completions",
+                data=payload
+            )
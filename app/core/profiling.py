@@ -0,0 +1,128 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+# Active trace for the current request; None unless the request is profiled
+current_trace: ContextVar[Optional["RequestTrace"]] = ContextVar("current_trace", default=None)
+
+
+class RequestTrace:
+    """Per-stage timings collected for one profiled request."""
+
+    __slots__ = ("method", "path", "trigger", "started_at", "start", "stages")
+
+    def __init__(self, method: str, path: str, trigger: str):
+        self.method = method
+        self.path = path
+        self.trigger = trigger
+        self.started_at = datetime.now(timezone.utc)
+        self.start = time.perf_counter()
+        self.stages: List[tuple] = []
+
+    def add_stage(self, stage: str, start: float, end: float):
+        # list.append is atomic, so threadpool stages can record concurrently
+        self.stages.append((stage, start, end))
+
+    def to_dict(self, status_code: int, duration: float) -> Dict[str, Any]:
+        return {
+            "method": self.method,
+            "path": self.path,
+            "status": status_code,
+            "trigger": self.trigger,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(duration * 1000, 3),
+            "stages": [
+                {
+                    "stage": stage,
+                    "offset_ms": round((start - self.start) * 1000, 3),
+                    "duration_ms": round((end - start) * 1000, 3),
+                }
+                for stage, start, end in sorted(self.stages, key=lambda s: s[1])
+            ],
+        }
+
+
+def record_stage(stage: str, start: float, end: float):
+    trace = current_trace.get()
+    if trace is not None:
+        trace.add_stage(stage, start, end)
+
+
+class SlowestTraces:
+    """Keeps the N slowest traces of this worker in a bounded min-heap."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._heap: List[tuple] = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def add(self, duration: float, trace: Dict[str, Any]):
+        item = (duration, next(self._counter), trace)
+        with self._lock:
+            if len(self._heap) < self.capacity:
+                heapq.heappush(self._heap, item)
+            elif duration > self._heap[0][0]:
+                heapq.heapreplace(self._heap, item)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            items = sorted(self._heap, key=lambda item: item[0], reverse=True)
+        return [trace for _, _, trace in items]
+
+    def clear(self):
+        with self._lock:
+            self._heap.clear()
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware that traces requests opted in by header or sampling.
+
+    Unprofiled requests pay one header scan and, with sampling enabled, one
+    random() call.
+    """
+
+    def __init__(self, app, store: SlowestTraces, sample_rate: float = 0.0, header: str = "x-profile"):
+        self.app = app
+        self.store = store
+        self.sample_rate = sample_rate
+        self.header = header.lower().encode("latin-1")
+
+    def _trigger(self, scope) -> Optional[str]:
+        for name, value in scope["headers"]:
+            if name == self.header and value not in (b"", b"0", b"false"):
+                return "header"
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sample"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        trigger = self._trigger(scope)
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequestTrace(scope["method"], scope["path"], trigger)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        token = current_trace.set(trace)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_trace.reset(token)
+            duration = time.perf_counter() - trace.start
+            self.store.add(duration, trace.to_dict(status_code, duration))
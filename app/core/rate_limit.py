@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import math
+import secrets
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+from redis import Redis
+
+from app.core.config import settings
+from app.core.metrics import OUTBOUND_ERRORS, RATE_LIMIT_REJECTIONS
+from app.core.redis import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+# Token buckets, refilled continuously. Uses the Redis clock so all workers agree.
+# KEYS are nested buckets (e.g. client, then user within it); ARGV is
+# {cost, capacity_1, rate_1, capacity_2, rate_2, ...} with rates in tokens per ms.
+# A token is taken from every bucket or from none.
+# Returns {allowed, retry_after_ms, index of the limiting bucket (1-based, 0 if allowed)}.
+TOKEN_BUCKET_LUA = """
+local cost = tonumber(ARGV[1])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local tokens = {}
+local allowed = 1
+local retry_after = 0
+local limiting = 0
+for i, key in ipairs(KEYS) do
+  local capacity = tonumber(ARGV[2 * i])
+  local rate = tonumber(ARGV[2 * i + 1])
+  local state = redis.call('HMGET', key, 'tokens', 'ts')
+  local current = tonumber(state[1])
+  local ts = tonumber(state[2])
+  if current == nil then
+    current = capacity
+    ts = now
+  end
+  current = math.min(capacity, current + math.max(0, now - ts) * rate)
+  if current < cost then
+    allowed = 0
+    local wait = math.ceil((cost - current) / rate)
+    if wait > retry_after then
+      retry_after = wait
+      limiting = i
+    end
+  end
+  tokens[i] = current
+end
+for i, key in ipairs(KEYS) do
+  local capacity = tonumber(ARGV[2 * i])
+  local rate = tonumber(ARGV[2 * i + 1])
+  if allowed == 1 then
+    tokens[i] = tokens[i] - cost
+  end
+  redis.call('HSET', key, 'tokens', tokens[i], 'ts', now)
+  redis.call('PEXPIRE', key, math.ceil(capacity / rate) + 1000)
+end
+return {allowed, retry_after, limiting}
+"""
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+def parse_rate(spec: str) -> Tuple[int, int]:
+    """Parse "60/minute" into (60 requests, 60 seconds)."""
+    count, _, period = spec.partition("/")
+    return int(count), _PERIODS[period.strip().rstrip("s")]
+
+
+class RateLimiter:
+    """Per-route, per-caller token buckets backed by one atomic Redis script call.
+
+    Use as a FastAPI dependency. The caller is the client named by the
+    X-Client-Id header (`client:<id>`) when X-Client-Key matches that client's
+    configured secret, else the client IP (`ip:<addr>`); its bucket is always
+    applied. An unverified X-Client-Id is ignored, so rotating or borrowing a
+    client id gets no fresh bucket and no override. Note that without a
+    verified client id all traffic relayed by a backend shares that backend's
+    single `ip:` bucket. When the JSON body
+    carries a `user_id`, a per-user bucket nested inside the client's bucket
+    is applied as well. The body is caller-controlled, so changing `user_id`
+    can never get a request past the client's own limit. Buckets that Redis
+    has rejected are remembered locally until their retry time, so a caller
+    hammering a limited route is turned away without touching Redis.
+    """
+
+    def __init__(
+        self,
+        get_redis: Callable[[], Redis],
+        enabled: bool,
+        default_rate: str,
+        route_rates: Dict[str, str],
+        key_rates: Dict[str, str],
+        client_keys: Optional[Dict[str, str]] = None
+    ):
+        self.get_redis = get_redis
+        self.enabled = enabled
+        self.default_rate = parse_rate(default_rate)
+        self.route_rates = {route: parse_rate(spec) for route, spec in route_rates.items()}
+        self.key_rates = {key: parse_rate(spec) for key, spec in key_rates.items()}
+        self.client_keys = client_keys or {}
+        self._blocked: Dict[str, float] = {}
+        self._script = None
+
+    def _client_identity(self, request: Request) -> str:
+        client_id = request.headers.get("x-client-id")
+        secret = self.client_keys.get(client_id) if client_id else None
+        if secret and secrets.compare_digest(
+            request.headers.get("x-client-key", "").encode("utf-8"), secret.encode("utf-8")
+        ):
+            return f"client:{client_id}"
+        return f"ip:{request.client.host if request.client else 'unknown'}"
+
+    async def _user_identity(self, request: Request) -> Optional[str]:
+        if request.method in ("POST", "PUT", "PATCH"):
+            try:
+                # FastAPI already read the body for validation, so this is cached
+                body = await request.json()
+                if isinstance(body, dict) and body.get("user_id"):
+                    return f"user:{body['user_id']}"
+            except Exception:
+                pass
+        return None
+
+    def _rate_for(self, route: str, identity: str) -> Tuple[int, int]:
+        return self.key_rates.get(identity) or self.route_rates.get(route) or self.default_rate
+
+    async def _buckets(self, request: Request, route: str) -> List[Tuple[str, int, int]]:
+        """(bucket key, limit, period) for the client and, if known, the user within it."""
+        client = self._client_identity(request)
+        client_bucket = f"ratelimit:{route}:{client}"
+        buckets = [(client_bucket, *self._rate_for(route, client))]
+        user = await self._user_identity(request)
+        if user is not None:
+            buckets.append((f"{client_bucket}:{user}", *self._rate_for(route, user)))
+        return buckets
+
+    def _reject(self, route: str, retry_after: float, source: str):
+        RATE_LIMIT_REJECTIONS.labels(route=route, source=source).inc()
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Rate limit exceeded",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+
+    def _consume(self, buckets: List[Tuple[str, int, int]]) -> Tuple[int, int, int]:
+        redis = self.get_redis()
+        if self._script is None or self._script.registered_client is not redis:
+            self._script = redis.register_script(TOKEN_BUCKET_LUA)
+        args: List[float] = [1]
+        for _, limit, period in buckets:
+            args.extend([limit, limit / (period * 1000)])
+        return self._script(keys=[bucket for bucket, _, _ in buckets], args=args)
+
+    async def __call__(self, request: Request):
+        if not self.enabled:
+            return
+        route = getattr(request.scope.get("route"), "path", request.url.path)
+        buckets = await self._buckets(request, route)
+
+        now = time.monotonic()
+        for bucket, _, _ in buckets:
+            blocked_until = self._blocked.get(bucket)
+            if blocked_until is not None:
+                if now < blocked_until:
+                    self._reject(route, blocked_until - now, "local")
+                del self._blocked[bucket]
+
+        try:
+            allowed, retry_after_ms, limiting = await asyncio.to_thread(self._consume, buckets)
+        except Exception as e:
+            # Fail open: an unavailable Redis must not take the API down
+            OUTBOUND_ERRORS.labels(target="redis").inc()
+            logger.warning(f"Rate limiter unavailable, allowing request: {e}")
+            return
+
+        if not allowed:
+            if len(self._blocked) > 10000:
+                self._blocked.clear()
+            self._blocked[buckets[limiting - 1][0]] = now + retry_after_ms / 1000
+            self._reject(route, retry_after_ms / 1000, "redis")
+
+
+rate_limiter = RateLimiter(
+    get_redis=get_redis_client,
+    enabled=settings.RATE_LIMIT_ENABLED,
+    default_rate=settings.RATE_LIMIT_DEFAULT,
+    route_rates=settings.RATE_LIMIT_ROUTES,
+    key_rates=settings.RATE_LIMIT_KEYS,
+    client_keys=settings.RATE_LIMIT_CLIENT_KEYS
+)
@@ -1,25 +1,33 @@
 from redis import Redis
+from typing import Optional
 from app.core.config import settings
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
-# Create Singleton Redis Client Instance
-redis_client = Redis.from_url(
-    settings.REDIS_URL,
-    decode_responses=True,
-    socket_connect_timeout=5,
-    socket_timeout=5
-)
+# Singleton Redis Client Instance, created on first use so importing the app never connects
+redis_client: Optional[Redis] = None
+_redis_lock = threading.Lock()
 
 def get_redis_client() -> Redis:
     """Get Redis client instance"""
+    global redis_client
+    if redis_client is None:
+        with _redis_lock:
+            if redis_client is None:
+                redis_client = Redis.from_url(
+                    settings.REDIS_URL,
+                    decode_responses=True,
+                    socket_connect_timeout=5,
+                    socket_timeout=5
+                )
     return redis_client
 
 async def verify_redis_connection():
     """Verify Redis connection on startup"""
     try:
-        redis_client.ping()
+        get_redis_client().ping()
         logger.info("✅ Successfully connected to Redis.")
     except Exception as e:
         logger.error(f"❌ Redis connection failed: {e}")
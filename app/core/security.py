@@ -1 +1,17 @@
-# Prilledge checks
\ No newline at end of file
+# Prilledge checks
+import secrets
+from typing import Optional
+from fastapi import Header, HTTPException, status
+from app.core.config import settings
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Guard admin endpoints with ADMIN_TOKEN; fail closed when it is not configured."""
+    if not settings.ADMIN_TOKEN:
+        # No token configured: behave as if the admin API did not exist
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not secrets.compare_digest(x_admin_token or "", settings.ADMIN_TOKEN):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid admin token"
+        )
@@ -0,0 +1,205 @@
+import asyncio
+import contextvars
+import hashlib
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
+
+from redis import Redis
+
+from app.core import deadline
+from app.core.metrics import CACHE_LOOKUPS, DEADLINE_EXCEEDED, OUTBOUND_ERRORS, observe_stage
+
+logger = logging.getLogger(__name__)
+
+
+def make_key(namespace: str, **parts: Any) -> str:
+    """Build a canonical key so logically identical requests map to the same flight."""
+    raw = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return f"{namespace}:{hashlib.sha1(raw.encode('utf-8')).hexdigest()}"
+
+
+class _Flight:
+    """One in-flight computation and the callers waiting for it."""
+
+    def __init__(self, context: contextvars.Context, deadline_at: Optional[float]):
+        self.context = context
+        # Latest deadline among the waiters; None once any waiter has no deadline
+        self.deadline_at = deadline_at
+        self.waiters = 0
+        self.task: Optional[asyncio.Task] = None
+
+
+class SingleFlight:
+    """Coalesces concurrent identical calls into one in-flight computation.
+
+    Within a worker, callers with the same key await one shared task. When a
+    Redis client getter is given, the leader of each worker also takes a short Redis
+    lock so that only one worker computes and the others read its result.
+
+    The shared task runs under the latest request deadline among its waiters
+    (none if any waiter has none), extended as callers join. Each caller
+    stops waiting at its own deadline, and the task is cancelled once the
+    last waiter has left.
+    """
+
+    def __init__(
+        self,
+        get_redis: Optional[Callable[[], Redis]] = None,
+        lock_ttl_ms: int = 3000,
+        result_ttl_ms: int = 1000,
+        poll_interval: float = 0.02
+    ):
+        self.get_redis = get_redis
+        self.lock_ttl_ms = lock_ttl_ms
+        self.result_ttl_ms = result_ttl_ms
+        self.poll_interval = poll_interval
+        self._calls: Dict[str, _Flight] = {}
+
+    async def do(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        dumps: Optional[Callable[[Any], Union[str, bytes]]] = None,
+        loads: Optional[Callable[[str], Any]] = None
+    ) -> Any:
+        try:
+            return await self._join(key, fn, dumps, loads)
+        except deadline.DeadlineExceeded as e:
+            # The flight gave up under an earlier deadline than this caller's (a
+            # stage captured it before a later waiter extended it): run once more
+            left = deadline.remaining()
+            if e.stage == "singleflight_wait" or (left is not None and left <= 0):
+                raise
+            return await self._join(key, fn, dumps, loads)
+
+    async def _join(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        dumps: Optional[Callable[[Any], Union[str, bytes]]],
+        loads: Optional[Callable[[str], Any]]
+    ) -> Any:
+        caller_deadline = deadline.current_deadline.get()
+        flight = self._calls.get(key)
+        if flight is not None and flight.task.done():
+            # Finished, but its done callback has not run yet
+            flight = None
+        if flight is not None:
+            CACHE_LOOKUPS.labels(cache="singleflight_local", result="hit").inc()
+            self._extend(flight, caller_deadline)
+        else:
+            CACHE_LOOKUPS.labels(cache="singleflight_local", result="miss").inc()
+            if self.get_redis is not None and dumps and loads:
+                coro = self._do_shared(key, fn, dumps, loads)
+            else:
+                coro = fn()
+            # The task gets its own context so waiters can extend its deadline
+            flight = _Flight(contextvars.copy_context(), caller_deadline)
+            flight.task = asyncio.get_running_loop().create_task(coro, context=flight.context)
+            self._calls[key] = flight
+            flight.task.add_done_callback(lambda t, k=key, f=flight: self._forget(k, f))
+
+        flight.waiters += 1
+        try:
+            left = deadline.remaining()
+            if left is None:
+                # shield: one caller being cancelled must not cancel the others' work
+                return await asyncio.shield(flight.task)
+            # asyncio.wait never cancels the task, neither on timeout nor when this caller is cancelled
+            done, _ = await asyncio.wait({flight.task}, timeout=max(left, 0))
+            if flight.task not in done:
+                DEADLINE_EXCEEDED.labels(stage="singleflight_wait").inc()
+                raise deadline.DeadlineExceeded("singleflight_wait")
+            return flight.task.result()
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Nobody is left to use the result: stop the work and let new callers start afresh
+                self._drop(key, flight)
+                flight.task.cancel()
+
+    @staticmethod
+    def _extend(flight: _Flight, caller_deadline: Optional[float]):
+        if flight.deadline_at is None:
+            return
+        if caller_deadline is None or caller_deadline > flight.deadline_at:
+            flight.deadline_at = caller_deadline
+            # The task is suspended while this caller runs, so its context can be entered.
+            # Stages that already copied it (threads, queued inference) keep the old value.
+            flight.context.run(deadline.current_deadline.set, caller_deadline)
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def _drop(self, key: str, flight: _Flight):
+        if self._calls.get(key) is flight:
+            del self._calls[key]
+
+    def _forget(self, key: str, flight: _Flight):
+        self._drop(key, flight)
+        if not flight.task.cancelled():
+            # Mark the exception as retrieved even if every caller went away
+            flight.task.exception()
+
+    async def _do_shared(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        dumps: Callable[[Any], Union[str, bytes]],
+        loads: Callable[[str], Any]
+    ) -> Any:
+        lock_key = f"singleflight:lock:{key}"
+        result_key = f"singleflight:result:{key}"
+        try:
+            redis = self.get_redis()
+            with observe_stage("cache_lookup", target="redis"):
+                cached = await asyncio.to_thread(redis.get, result_key)
+            if cached is not None:
+                CACHE_LOOKUPS.labels(cache="singleflight_redis", result="hit").inc()
+                return loads(cached)
+            CACHE_LOOKUPS.labels(cache="singleflight_redis", result="miss").inc()
+            acquired = await asyncio.to_thread(
+                redis.set, lock_key, "1", nx=True, px=self.lock_ttl_ms
+            )
+        except Exception as e:
+            OUTBOUND_ERRORS.labels(target="redis").inc()
+            logger.warning(f"Single-flight Redis unavailable, computing locally: {e}")
+            return await fn()
+
+        if acquired:
+            try:
+                result = await fn()
+                try:
+                    await asyncio.to_thread(
+                        redis.set, result_key, dumps(result), px=self.result_ttl_ms
+                    )
+                except Exception as e:
+                    OUTBOUND_ERRORS.labels(target="redis").inc()
+                    logger.warning(f"Failed to publish single-flight result {result_key}: {e}")
+                return result
+            finally:
+                try:
+                    await asyncio.to_thread(redis.delete, lock_key)
+                except Exception as e:
+                    OUTBOUND_ERRORS.labels(target="redis").inc()
+                    logger.warning(f"Failed to release single-flight lock {lock_key}: {e}")
+
+        # Another worker is computing: wait for its result until the lock expires
+        loop = asyncio.get_running_loop()
+        wait_until = loop.time() + self.lock_ttl_ms / 1000
+        try:
+            while loop.time() < wait_until:
+                deadline.check("singleflight_poll")
+                await asyncio.sleep(self.poll_interval)
+                cached = await asyncio.to_thread(redis.get, result_key)
+                if cached is not None:
+                    return loads(cached)
+                if not await asyncio.to_thread(redis.exists, lock_key):
+                    break
+        except deadline.DeadlineExceeded:
+            raise
+        except Exception as e:
+            OUTBOUND_ERRORS.labels(target="redis").inc()
+            logger.warning(f"Single-flight wait failed, computing locally: {e}")
+        return await fn()
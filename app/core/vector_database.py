@@ -2,32 +2,48 @@ from qdrant_client import QdrantClient
 from qdrant_client.http.exceptions import UnexpectedResponse
 from qdrant_client.http import models
 from app.core.config import settings
+from typing import Optional
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
-# create Singleton Instance
-qdrant_client = QdrantClient(
-    url=settings.QDRANT_URL, 
-    api_key=settings.QDRANT_API_KEY,
-    timeout=settings.QDRANT_TIMEOUT
-)
+# Singleton Instance, created on first use so importing the app never connects
+qdrant_client: Optional[QdrantClient] = None
+_qdrant_lock = threading.Lock()
 
 def get_qdrant_client() -> QdrantClient:
+    global qdrant_client
+    if qdrant_client is None:
+        with _qdrant_lock:
+            if qdrant_client is None:
+                qdrant_client = QdrantClient(
+                    url=settings.QDRANT_URL,
+                    api_key=settings.QDRANT_API_KEY,
+                    timeout=settings.QDRANT_TIMEOUT
+                )
     return qdrant_client
 
-def create_collection_if_not_exists(collection_name: str, vector_size: int = 384):
-    """Create a Qdrant collection if it doesn't exist."""
+def create_collection_if_not_exists(collection_name: str, vector_size: int = 384, multivector: bool = False):
+    """Create a Qdrant collection if it doesn't exist.
+
+    With multivector=True each point holds several vectors (one per text chunk)
+    and is scored by its best-matching one.
+    """
     try:
-        collections = qdrant_client.get_collections().collections
+        client = get_qdrant_client()
+        collections = client.get_collections().collections
         existing_names = [col.name for col in collections]
         
         if collection_name not in existing_names:
-            qdrant_client.create_collection(
+            client.create_collection(
                 collection_name=collection_name,
                 vectors_config=models.VectorParams(
                     size=vector_size,
-                    distance=models.Distance.COSINE
+                    distance=models.Distance.COSINE,
+                    multivector_config=models.MultiVectorConfig(
+                        comparator=models.MultiVectorComparator.MAX_SIM
+                    ) if multivector else None
                 )
             )
             logger.info(f"Created collection '{collection_name}' with vector size {vector_size}")
@@ -39,7 +55,7 @@ def create_collection_if_not_exists(collection_name: str, vector_size: int = 384
 
 async def verify_qdrant_connection():
     try:
-        qdrant_client.get_collections()
+        get_qdrant_client().get_collections()
         logger.info("Successfully connected to Qdrant Cloud/DB.")
     except UnexpectedResponse as e:
         logger.error(f"Qdrant connection failed (Unauthorized/Invalid URL): {e}")
@@ -0,0 +1,291 @@
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import numpy as np
+from qdrant_client import QdrantClient
+
+logger = logging.getLogger(__name__)
+
+PointId = Union[int, str]
+
+
+def _normalize(vectors: Any) -> np.ndarray:
+    """Return float32 rows scaled to unit length (cosine == dot product)."""
+    rows = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(rows, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return rows / norms
+
+
+def matches_filters(payload: Dict[str, Any], filters: Optional[Dict[str, Any]]) -> bool:
+    """Local equivalent of SearchRepository._build_filters (match value / range)."""
+    if not filters:
+        return True
+    for key, condition in filters.items():
+        value = payload.get(key)
+        if isinstance(condition, dict):
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                return False
+            if "gt" in condition and condition["gt"] is not None and not value > condition["gt"]:
+                return False
+            if "gte" in condition and condition["gte"] is not None and not value >= condition["gte"]:
+                return False
+            if "lt" in condition and condition["lt"] is not None and not value < condition["lt"]:
+                return False
+            if "lte" in condition and condition["lte"] is not None and not value <= condition["lte"]:
+                return False
+        elif isinstance(value, list):
+            if condition not in value:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+class CollectionSnapshot:
+    """One on-disk version of a collection; vectors are memory-mapped."""
+
+    def __init__(self, version: str, vectors: np.ndarray, owners: Optional[np.ndarray], ids: List[PointId], payloads: List[dict]):
+        self.version = version
+        self.vectors = vectors
+        # For multivector collections: index of the point each row belongs to
+        self.owners = owners
+        self.ids = ids
+        self.payloads = payloads
+        self.index_of = {point_id: i for i, point_id in enumerate(ids)}
+
+
+class LocalReplica:
+    """Local, periodically refreshed copy of Qdrant collections for degraded mode.
+
+    Each refresh scrolls the collection into versioned files under
+    `root/<collection>/` (one worker builds while the others wait on a file
+    lock, then load the result). Upserts and deletes from the sync endpoints
+    go into an in-memory overlay until the next snapshot includes them.
+    Search is exact: one matrix-vector product over the memory-mapped vectors.
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        root: str,
+        collections: List[str],
+        refresh_interval: float,
+        excluded_fields: List[str],
+        get_client: Callable[[], QdrantClient]
+    ):
+        self.enabled = enabled
+        self.root = Path(root)
+        self.collections = collections
+        self.refresh_interval = refresh_interval
+        self.excluded_fields = set(excluded_fields)
+        self.get_client = get_client
+        self._snapshots: Dict[str, CollectionSnapshot] = {}
+        self._overlay: Dict[str, Dict[PointId, tuple]] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def is_available(self, collection: str) -> bool:
+        return self.enabled and (collection in self._snapshots or bool(self._overlay.get(collection)))
+
+    def _project(self, payload: Optional[dict]) -> dict:
+        return {k: v for k, v in (payload or {}).items() if k not in self.excluded_fields}
+
+    # --- Keeping the copy current ---
+
+    def apply_upsert(self, collection: str, point_ids: List[PointId], vectors: list, payloads: List[dict]):
+        if not self.enabled or collection not in self.collections:
+            return
+        now = time.time()
+        with self._lock:
+            overlay = self._overlay.setdefault(collection, {})
+            for point_id, vector, payload in zip(point_ids, vectors, payloads):
+                overlay[point_id] = (now, _normalize(vector), self._project(payload))
+
+    def apply_delete(self, collection: str, point_id: PointId):
+        if not self.enabled or collection not in self.collections:
+            return
+        with self._lock:
+            self._overlay.setdefault(collection, {})[point_id] = (time.time(), None, None)
+
+    def refresh(self, collection: str):
+        """Rebuild the snapshot if it is older than the interval, then load the latest one."""
+        directory = self.root / collection
+        directory.mkdir(parents=True, exist_ok=True)
+        manifest = directory / "manifest.json"
+
+        if not manifest.exists() or time.time() - manifest.stat().st_mtime >= self.refresh_interval:
+            with open(directory / ".lock", "w") as lock_file:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    # Another worker is building; load whatever is there now
+                    pass
+                else:
+                    try:
+                        self._build(collection, directory)
+                    finally:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        self._load(collection, directory)
+
+    def _build(self, collection: str, directory: Path):
+        started = time.time()
+        client = self.get_client()
+        rows: List[np.ndarray] = []
+        owners: List[int] = []
+        ids: List[PointId] = []
+        payloads: List[dict] = []
+        multivector = False
+        offset = None
+        while True:
+            points, offset = client.scroll(
+                collection_name=collection,
+                limit=256,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True
+            )
+            for point in points:
+                vector = point.vector
+                if not isinstance(vector, list) or not vector:
+                    continue
+                point_rows = _normalize(vector)
+                multivector = multivector or isinstance(vector[0], list)
+                owners.extend([len(ids)] * len(point_rows))
+                rows.append(point_rows)
+                ids.append(point.id)
+                payloads.append(self._project(point.payload))
+            if offset is None:
+                break
+
+        version = str(int(started * 1000))
+        vectors = np.concatenate(rows) if rows else np.zeros((0, 0), dtype=np.float32)
+        np.save(directory / f"vectors-{version}.npy", vectors)
+        if multivector:
+            np.save(directory / f"owners-{version}.npy", np.asarray(owners, dtype=np.int64))
+        with open(directory / f"points-{version}.json", "w") as f:
+            json.dump({"ids": ids, "payloads": payloads}, f, default=str)
+
+        manifest_tmp = directory / "manifest.json.tmp"
+        with open(manifest_tmp, "w") as f:
+            json.dump({"version": version, "multivector": multivector, "count": len(ids)}, f)
+        os.replace(manifest_tmp, directory / "manifest.json")
+
+        # Readers of older versions keep their mappings; unlinking is safe
+        for path in directory.iterdir():
+            if path.suffix in (".npy", ".json") and "-" in path.stem and not path.stem.endswith(version):
+                path.unlink(missing_ok=True)
+        logger.info(f"Local replica of '{collection}' rebuilt: {len(ids)} points")
+
+    def _load(self, collection: str, directory: Path):
+        manifest_path = directory / "manifest.json"
+        if not manifest_path.exists():
+            return
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        version = manifest["version"]
+        current = self._snapshots.get(collection)
+        if current is not None and current.version == version:
+            return
+
+        vectors = np.load(directory / f"vectors-{version}.npy", mmap_mode="r")
+        owners = np.load(directory / f"owners-{version}.npy") if manifest["multivector"] else None
+        with open(directory / f"points-{version}.json") as f:
+            points = json.load(f)
+        self._snapshots[collection] = CollectionSnapshot(version, vectors, owners, points["ids"], points["payloads"])
+
+        # Overlay entries older than the snapshot (its version is the build start time) are part of it
+        built_at = int(version) / 1000
+        with self._lock:
+            overlay = self._overlay.get(collection, {})
+            for point_id in [pid for pid, entry in overlay.items() if entry[0] < built_at]:
+                del overlay[point_id]
+
+    async def _run(self):
+        while True:
+            for collection in self.collections:
+                try:
+                    await asyncio.to_thread(self.refresh, collection)
+                except Exception as e:
+                    logger.error(f"Local replica refresh of '{collection}' failed: {e}")
+            # Check often so workers pick up snapshots built by another worker
+            await asyncio.sleep(max(5.0, self.refresh_interval / 5))
+
+    def start(self):
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # --- Serving ---
+
+    def search(
+        self,
+        collection: str,
+        query_vector: List[float],
+        top_k: int,
+        filters: Optional[Dict[str, Any]] = None,
+        payload_fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        query = _normalize(query_vector)[0]
+        snapshot = self._snapshots.get(collection)
+        with self._lock:
+            overlay = dict(self._overlay.get(collection, {}))
+
+        candidates: Dict[PointId, tuple] = {}
+        if snapshot is not None and len(snapshot.ids):
+            scores = np.asarray(snapshot.vectors @ query, dtype=np.float32)
+            if snapshot.owners is not None:
+                # Multivector points score by their best chunk
+                per_point = np.full(len(snapshot.ids), -np.inf, dtype=np.float32)
+                np.maximum.at(per_point, snapshot.owners, scores)
+                scores = per_point
+            if filters:
+                mask = np.fromiter(
+                    (matches_filters(payload, filters) for payload in snapshot.payloads),
+                    dtype=bool,
+                    count=len(snapshot.payloads)
+                )
+                scores = np.where(mask, scores, -np.inf)
+            for point_id in overlay:
+                index = snapshot.index_of.get(point_id)
+                if index is not None:
+                    scores[index] = -np.inf
+
+            k = min(top_k, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            for index in top:
+                if np.isfinite(scores[index]):
+                    candidates[snapshot.ids[index]] = (float(scores[index]), snapshot.payloads[index])
+
+        for point_id, (_, vectors, payload) in overlay.items():
+            if vectors is None or not matches_filters(payload, filters):
+                continue
+            candidates[point_id] = (float((vectors @ query).max()), payload)
+
+        ranked = sorted(candidates.items(), key=lambda item: item[1][0], reverse=True)[:top_k]
+        return [
+            {
+                "id": point_id,
+                "score": score,
+                "payload": (
+                    {k: v for k, v in payload.items() if k in payload_fields}
+                    if payload_fields is not None else payload
+                ),
+            }
+            for point_id, (score, payload) in ranked
+        ]
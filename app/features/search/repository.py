@@ -2,7 +2,7 @@ from qdrant_client import QdrantClient
 from qdrant_client.http import models
 from fastapi import Depends
 from typing import List, Optional, Dict, Any, Union
-from app.features.search.schemas import SearchResult
+from app.core.metrics import observe_stage
 
 class SearchRepository:
     def __init__(self, client: QdrantClient):
@@ -37,47 +37,78 @@ class SearchRepository:
         query_vector: List[float],
         top_k: int = 5,
         filters: Optional[Dict[str, Any]] = None,
-        with_payload: bool = True
-    ) -> List[SearchResult]:
+        with_payload: Union[bool, List[str]] = True,
+        multivector: bool = False,
+        timeout: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
         query_filter = self._build_filters(filters)
-
-        search_results = self.client.query_points(
-            collection_name=collection_name,
-            query=query_vector,
-            query_filter=query_filter,
-            limit=top_k,
-            with_payload=with_payload
+        # A one-vector multivector query scores each point by its best chunk (MAX_SIM)
+        query = [query_vector] if multivector else query_vector
+        # A list of field names is sent as a payload selector so Qdrant only returns those
+        payload_selector = (
+            models.PayloadSelectorInclude(include=with_payload)
+            if isinstance(with_payload, list) else with_payload
         )
 
+        with observe_stage("vector_search", target="qdrant"):
+            search_results = self.client.query_points(
+                collection_name=collection_name,
+                query=query,
+                query_filter=query_filter,
+                limit=top_k,
+                with_payload=payload_selector,
+                # Server-side limit in whole seconds
+                timeout=timeout
+            )
+
+        return self._map_results(search_results.points)
+
+    def _map_results(self, points: List[models.ScoredPoint]) -> List[Dict[str, Any]]:
+        # Plain dicts in the SearchResult shape; skips per-hit Pydantic validation
         return [
-            SearchResult(
-                id=hit.id,
-                score=hit.score,
-                payload=hit.payload
-            ) for hit in search_results.points
+            {"id": hit.id, "score": hit.score, "payload": hit.payload or {}}
+            for hit in points
         ]
 
     def upsert_point(
         self, 
         collection_name: str, 
         point_id: Union[int, str], 
-        vector: List[float], 
+        vector: Union[List[float], List[List[float]]], 
         payload: dict
     ):
-        self.client.upsert(
-            collection_name=collection_name,
-            points=[
-                models.PointStruct(
-                    id=point_id,
-                    vector=vector,
-                    payload=payload
-                )
-            ]
-        )
+        with observe_stage("upsert", target="qdrant"):
+            self.client.upsert(
+                collection_name=collection_name,
+                points=[
+                    models.PointStruct(
+                        id=point_id,
+                        vector=vector,
+                        payload=payload
+                    )
+                ]
+            )
+
+    def upsert_points(
+        self,
+        collection_name: str,
+        point_ids: List[Union[int, str]],
+        vectors: List[Union[List[float], List[List[float]]]],
+        payloads: List[dict]
+    ):
+        with observe_stage("upsert", target="qdrant"):
+            self.client.upsert(
+                collection_name=collection_name,
+                points=[
+                    models.PointStruct(id=point_id, vector=vector, payload=payload)
+                    for point_id, vector, payload in zip(point_ids, vectors, payloads)
+                ]
+            )
 
     def delete_point(self, collection_name: str, point_id: Union[int, str]):
-        self.client.delete(
-            collection_name=collection_name,
-            points_selector=models.PointIdsList(points=[point_id])
-        )
+        with observe_stage("delete", target="qdrant"):
+            self.client.delete(
+                collection_name=collection_name,
+                points_selector=models.PointIdsList(points=[point_id])
+            )
     
\ No newline at end of file
@@ -26,6 +26,11 @@ class SearchRequest(BaseModel):
         example="learning_path",
         description="Type of resource to search (e.g. learning_path, course, article)"
     )
+    payload_fields: Optional[List[str]] = Field(
+        None,
+        example=["title", "category_id"],
+        description="Payload fields to return for each result (default: all fields)"
+    )
 
 class UpsertRequest(BaseModel):
     """Generic upsert schema for adding/updating vector data (can be extended per resource)"""
@@ -1,20 +1,61 @@
-from typing import List, Optional, Dict, Any
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple
 from fastapi import Depends
+from fastapi.concurrency import run_in_threadpool
 from app.features.search.repository import SearchRepository
-from app.core.embedding import EmbeddingService
-from app.features.search.schemas import SearchResponse
+from app.core import deadline
+from app.core.config import settings
+from app.core.embedding import EmbeddingService, get_embedding_service
+from app.core.inference_scheduler import BULK, INTERACTIVE, inference_scheduler
+from app.core.metrics import REPLICA_FALLBACKS
+from app.core.redis import get_redis_client
+from app.core.singleflight import SingleFlight, make_key
+from app.features.search.replica import LocalReplica
+from app.features.search.schemas import SyncLearningPathRequest
+from app.features.search.warmup import QueryLog, QueryWarmup
 from app.core.vector_database import get_qdrant_client, create_collection_if_not_exists
 from qdrant_client import QdrantClient
+import asyncio
 import logging
+import math
+import orjson
 
 logger = logging.getLogger(__name__)
 
+# Shared by all SearchService instances of this worker
+search_flight = SingleFlight(
+    get_redis=get_redis_client if settings.SINGLEFLIGHT_REDIS_ENABLED else None,
+    lock_ttl_ms=settings.SINGLEFLIGHT_LOCK_TTL_MS,
+    result_ttl_ms=settings.SINGLEFLIGHT_RESULT_TTL_MS
+)
+
+local_replica = LocalReplica(
+    enabled=settings.LOCAL_REPLICA_ENABLED,
+    root=settings.LOCAL_REPLICA_DIR,
+    collections=settings.LOCAL_REPLICA_COLLECTIONS,
+    refresh_interval=settings.LOCAL_REPLICA_REFRESH_INTERVAL,
+    excluded_fields=settings.LOCAL_REPLICA_EXCLUDED_FIELDS,
+    get_client=get_qdrant_client
+)
+
+query_log = QueryLog(
+    get_redis=get_redis_client,
+    sample_rate=settings.QUERY_LOG_SAMPLE_RATE,
+    max_entries=settings.QUERY_LOG_MAX_ENTRIES,
+    half_life=settings.QUERY_LOG_HALF_LIFE_S
+)
+
+query_warmup = QueryWarmup(
+    query_log=query_log,
+    enabled=settings.WARMUP_ENABLED,
+    top_n=settings.WARMUP_TOP_N,
+    batch_size=settings.WARMUP_BATCH_SIZE,
+    time_budget=settings.WARMUP_TIME_BUDGET_S,
+    replay_search=settings.WARMUP_SEARCH
+)
+
 def get_search_repository(client: QdrantClient = Depends(get_qdrant_client)) -> SearchRepository:
     return SearchRepository(client=client)
 
-def get_embedding_service() -> EmbeddingService:
-    return EmbeddingService()
-
 class SearchService:
     def __init__(
         self,
@@ -29,52 +70,224 @@ class SearchService:
         query: str,
         top_k: int,
         filters: Optional[Dict[str, Any]] = None,
-        resource_type: str = "learning_paths" # ตั้ง Default เป็นชื่อ collection หลัก
-    ) -> SearchResponse:
+        resource_type: str = "learning_paths", # ตั้ง Default เป็นชื่อ collection หลัก
+        payload_fields: Optional[List[str]] = None,
+        record: bool = True
+    ) -> Dict[str, Any]:
+        """Returns a dict in the SearchResponse shape (serialized directly, see the endpoint).
+
+        `record=False` keeps the search out of the query log (used by the warm-up replay).
+        """
+        if record:
+            query_log.maybe_record({
+                "query": query,
+                "top_k": top_k,
+                "filters": filters,
+                "resource_type": resource_type
+            })
+        # Don't start or join a flight without time left to wait for it
+        deadline.check("search", settings.DEADLINE_MIN_STAGE_MS / 1000)
         try:
-            logger.info(f"Searching in collection: {resource_type} with query: {query}")
-            # แปลง Input Text เป็น Vector (ต้องได้ 384 dims ตาม Qdrant)
-            vector = self.embedding.generate_vector(query)
-            logger.info(f"Generated vector with {len(vector)} dimensions")
-            
-            # เรียกใช้ search แบบ Generic โดยส่งชื่อ collection เข้าไปตรงๆ
-            results = self.repository.search(
-                collection_name=resource_type, 
-                query_vector=vector, 
-                top_k=top_k, 
-                filters=filters
+            key = make_key(
+                "search",
+                query=query,
+                top_k=top_k,
+                filters=filters,
+                resource_type=resource_type,
+                payload_fields=payload_fields
+            )
+            # Identical concurrent searches share one embedding + Qdrant round trip.
+            # The flight runs under the latest deadline of its callers; each caller
+            # waits only as long as its own deadline allows.
+            return await search_flight.do(
+                key,
+                lambda: self._search(query, top_k, filters, resource_type, payload_fields),
+                dumps=orjson.dumps,
+                loads=orjson.loads
             )
-            
-            logger.info(f"Search returned {len(results)} results")
-            return SearchResponse(query=query, total=len(results), results=results)
+        except deadline.DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"Search Error: {e}", exc_info=True)
-            return SearchResponse(query=query, total=0, results=[])
+            return {"query": query, "total": 0, "results": []}
 
-    async def sync_upsert(self, collection_name: str, path_id: int, title: str, description: str, metadata: dict):
-        # สร้าง Vector จาก Title + Description
-        vector = self.embedding.get_path_vector(title, description)
-        
+    async def _search(
+        self,
+        query: str,
+        top_k: int,
+        filters: Optional[Dict[str, Any]],
+        resource_type: str,
+        payload_fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        logger.info(f"Searching in collection: {resource_type} with query: {query}")
+        # แปลง Input Text เป็น Vector (ต้องได้ 384 dims ตาม Qdrant)
+        min_stage = settings.DEADLINE_MIN_STAGE_MS / 1000
+        deadline.check("encode", min_stage)
+        # Run blocking work off the event loop so concurrent callers can join the flight
+        vector = await inference_scheduler.run(INTERACTIVE, self.embedding.generate_query_vector, query)
+        logger.info(f"Generated vector with {len(vector)} dimensions")
+
+        replica_available = local_replica.is_available(resource_type)
+        try:
+            # Never give Qdrant more time than the caller has left
+            qdrant_timeout = deadline.timeout(settings.QDRANT_TIMEOUT, "vector_search", min_stage)
+        except deadline.DeadlineExceeded:
+            if not replica_available:
+                raise
+            # Too little time for a round trip, but a local search still fits
+            REPLICA_FALLBACKS.labels(reason="deadline").inc()
+            results = await run_in_threadpool(
+                local_replica.search, resource_type, vector, top_k, filters, payload_fields
+            )
+            return {"query": query, "total": len(results), "results": results}
+
+        # เรียกใช้ search แบบ Generic โดยส่งชื่อ collection เข้าไปตรงๆ
+        qdrant_search = run_in_threadpool(
+            self.repository.search,
+            collection_name=resource_type,
+            query_vector=vector,
+            top_k=top_k,
+            filters=filters,
+            with_payload=payload_fields if payload_fields is not None else True,
+            multivector=settings.EMBEDDING_CHUNK_MODE == "multivector",
+            timeout=max(1, math.ceil(qdrant_timeout))
+        )
+        if not replica_available:
+            results = await qdrant_search
+        else:
+            try:
+                results = await asyncio.wait_for(
+                    qdrant_search,
+                    timeout=min(settings.LOCAL_REPLICA_LATENCY_BUDGET_MS / 1000, qdrant_timeout)
+                )
+            except Exception as e:
+                # Slightly stale results beat an empty page when Qdrant is degraded
+                reason = "timeout" if isinstance(e, asyncio.TimeoutError) else "error"
+                REPLICA_FALLBACKS.labels(reason=reason).inc()
+                logger.warning(f"Qdrant search failed ({reason}), serving from local replica: {e}")
+                results = await run_in_threadpool(
+                    local_replica.search, resource_type, vector, top_k, filters, payload_fields
+                )
+
+        logger.info(f"Search returned {len(results)} results")
+        return {"query": query, "total": len(results), "results": results}
+
+    def _path_vectors(self, paths: List[Tuple[str, str]]) -> list:
+        return self.embedding.get_path_vectors(
+            paths,
+            mode=settings.EMBEDDING_CHUNK_MODE,
+            chunk_tokens=settings.EMBEDDING_CHUNK_TOKENS,
+            overlap=settings.EMBEDDING_CHUNK_OVERLAP
+        )
+
+    @staticmethod
+    def _build_payload(title: str, description: str, metadata: dict) -> dict:
         # รวม title, description เข้ากับ metadata
-        payload = {
+        return {
             "title": title,
             "description": description,
             **metadata  # เพิ่ม metadata อื่นๆ เช่น category_id, difficulty
         }
-        
-        self.repository.upsert_point(
+
+    async def sync_upsert(
+        self,
+        collection_name: str,
+        path_id: int,
+        title: str,
+        description: str,
+        metadata: dict,
+        vector: Optional[list] = None
+    ):
+        """Upsert one path; `vector` skips the encode when it is already computed."""
+        if vector is None:
+            # สร้าง Vector จาก Title + Description
+            vector = (await inference_scheduler.run(BULK, self._path_vectors, [(title, description)]))[0]
+
+        payload = self._build_payload(title, description, metadata)
+        # Off the event loop: a slow or unreachable Qdrant must not stall other requests
+        await run_in_threadpool(
+            self.repository.upsert_point,
             collection_name=collection_name,
             point_id=path_id,
             vector=vector,
             payload=payload
         )
+        local_replica.apply_upsert(collection_name, [path_id], [vector], [payload])
+
+    async def sync_upsert_batches(
+        self, collection_name: str, paths: List[SyncLearningPathRequest]
+    ) -> AsyncIterator[Tuple[List[SyncLearningPathRequest], Optional[list], Optional[Exception]]]:
+        """Embed and upsert paths in batches of INFERENCE_BULK_BATCH_SIZE.
+
+        Yields each batch with its vectors (None if the encode failed) and the
+        error that failed it (None on success), so the caller only has to
+        retry that batch, without re-encoding it when only the upsert failed. Every encode batch is queued
+        up front: the next one is embedded while the current one is upserted,
+        and interactive searches still run in between bulk batches.
+        """
+        batch_size = settings.INFERENCE_BULK_BATCH_SIZE
+        batches = [paths[start:start + batch_size] for start in range(0, len(paths), batch_size)]
+        encodes = [
+            asyncio.ensure_future(inference_scheduler.run(
+                BULK, self._path_vectors, [(path.title, path.description) for path in batch]
+            ))
+            for batch in batches
+        ]
+        try:
+            for batch, encode in zip(batches, encodes):
+                try:
+                    vectors = await encode
+                except Exception as e:
+                    yield batch, None, e
+                    continue
+                try:
+                    await self._upsert_batch(collection_name, batch, vectors)
+                except Exception as e:
+                    yield batch, vectors, e
+                else:
+                    yield batch, vectors, None
+        finally:
+            # The caller stopped early: drop encode batches that have not run yet
+            for encode in encodes:
+                encode.cancel()
+
+    async def _upsert_batch(self, collection_name: str, paths: List[SyncLearningPathRequest], vectors: list):
+        point_ids = [path.path_id for path in paths]
+        payloads = [self._build_payload(path.title, path.description, path.metadata) for path in paths]
+        await run_in_threadpool(
+            self.repository.upsert_points,
+            collection_name=collection_name,
+            point_ids=point_ids,
+            vectors=vectors,
+            payloads=payloads
+        )
+        local_replica.apply_upsert(collection_name, point_ids, vectors, payloads)
+
+    async def warm_up(self):
+        """Replay recorded top queries through the embedding (and optionally search) path."""
+        await query_warmup.run(
+            self.embedding,
+            search=lambda entry: self.search(
+                query=entry["query"],
+                top_k=entry.get("top_k", 7),
+                filters=entry.get("filters"),
+                resource_type=entry.get("resource_type") or "learning_paths",
+                # Replays must not bump their own counts, or top entries never age out
+                record=False
+            )
+        )
 
     async def sync_delete(self, collection_name: str, path_id: int):
-        self.repository.delete_point(collection_name, path_id)
+        await run_in_threadpool(self.repository.delete_point, collection_name, path_id)
+        local_replica.apply_delete(collection_name, path_id)
 
     def initialize_collections(self, collection_name: str = "learning_paths", vector_size: int = 384):
         """Initialize required Qdrant collections."""
-        create_collection_if_not_exists(collection_name, vector_size)
+        create_collection_if_not_exists(
+            collection_name,
+            vector_size,
+            multivector=settings.EMBEDDING_CHUNK_MODE == "multivector"
+        )
         logger.info(f"Collection '{collection_name}' initialized successfully")
 
     def get_collection_info(self, collection_name: str) -> Dict[str, Any]:
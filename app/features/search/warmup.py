@@ -0,0 +1,157 @@
+import asyncio
+import json
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from redis import Redis
+
+from app.core.embedding import EmbeddingService
+from app.core.inference_scheduler import INTERACTIVE, inference_scheduler
+from app.core.metrics import OUTBOUND_ERRORS, WARMUP_QUERIES, warmup_progress
+
+logger = logging.getLogger(__name__)
+
+
+class QueryLog:
+    """Sampled, decaying frequency log of search requests in a Redis sorted set.
+
+    The set may grow to twice max_entries before it is trimmed back, so a new
+    query has time to build up a count instead of being evicted on arrival.
+    Once per half_life (whichever worker records first) all scores are halved
+    and entries that faded below MIN_SCORE are dropped, so yesterday's top
+    queries give way to today's. The first record only starts the clock.
+    """
+
+    KEY = "search:query_log"
+    DECAY_KEY = "search:query_log:decayed"
+    # Marks a log whose half-life clock has been started
+    STARTED_KEY = "search:query_log:started"
+    MIN_SCORE = 0.1
+
+    def __init__(self, get_redis: Callable[[], Redis], sample_rate: float, max_entries: int, half_life: float):
+        self.get_redis = get_redis
+        self.sample_rate = sample_rate
+        self.max_entries = max_entries
+        self.half_life = half_life
+        self._pending: Set[asyncio.Task] = set()
+
+    def record(self, entry: Dict[str, Any]):
+        member = json.dumps(entry, sort_keys=True, separators=(",", ":"), default=str)
+        redis = self.get_redis()
+        pipe = redis.pipeline(transaction=False)
+        pipe.zincrby(self.KEY, 1, member)
+        pipe.zcard(self.KEY)
+        pipe.set(self.STARTED_KEY, 1, nx=True)
+        # Succeeds for one caller per half-life: that caller applies the decay
+        pipe.set(self.DECAY_KEY, 1, nx=True, ex=max(1, int(self.half_life)))
+        _, size, first, decay = pipe.execute()
+
+        pipe = redis.pipeline(transaction=False)
+        # On the very first record the decay key was missing because it never existed
+        if decay and not first:
+            pipe.zunionstore(self.KEY, {self.KEY: 0.5})
+            pipe.zremrangebyscore(self.KEY, "-inf", f"({self.MIN_SCORE}")
+        if size > self.max_entries * 2:
+            # Keep the most frequent entries only
+            pipe.zremrangebyrank(self.KEY, 0, -(self.max_entries + 1))
+        if len(pipe):
+            pipe.execute()
+
+    def maybe_record(self, entry: Dict[str, Any]):
+        """Record a sampled share of requests without making the caller wait."""
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return
+        task = asyncio.create_task(asyncio.to_thread(self.record, entry))
+        self._pending.add(task)
+        task.add_done_callback(self._done)
+
+    def _done(self, task: asyncio.Task):
+        self._pending.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            OUTBOUND_ERRORS.labels(target="redis").inc()
+            logger.warning(f"Failed to record search query: {task.exception()}")
+
+    def top(self, n: int) -> List[Dict[str, Any]]:
+        return [json.loads(member) for member in self.get_redis().zrevrange(self.KEY, 0, n - 1)]
+
+
+class QueryWarmup:
+    """Replays the most frequent recorded queries before the worker reports ready."""
+
+    def __init__(
+        self,
+        query_log: QueryLog,
+        enabled: bool,
+        top_n: int,
+        batch_size: int,
+        time_budget: float,
+        replay_search: bool
+    ):
+        self.query_log = query_log
+        self.enabled = enabled
+        self.top_n = top_n
+        self.batch_size = batch_size
+        self.time_budget = time_budget
+        self.replay_search = replay_search
+        self.status = "pending"
+        self.total = 0
+        self.completed = 0
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "skipped", "timed_out", "failed")
+
+    def progress(self) -> Dict[str, Any]:
+        return {"status": self.status, "completed": self.completed, "total": self.total}
+
+    def _advance(self, count: int, path: str):
+        self.completed += count
+        WARMUP_QUERIES.labels(path=path).inc(count)
+        warmup_progress().set(self.completed / self.total if self.total else 1.0)
+
+    async def run(
+        self,
+        embedding: EmbeddingService,
+        search: Optional[Callable[[Dict[str, Any]], Awaitable[Any]]] = None
+    ):
+        if not self.enabled:
+            self.status = "skipped"
+            return
+        self.status = "running"
+        start = time.monotonic()
+        deadline = start + self.time_budget
+        try:
+            entries = await asyncio.wait_for(
+                asyncio.to_thread(self.query_log.top, self.top_n), timeout=self.time_budget
+            )
+            queries = list(dict.fromkeys(entry["query"] for entry in entries))
+            replay = search is not None and self.replay_search
+            self.total = len(queries) + (len(entries) if replay else 0)
+            warmup_progress().set(0.0 if self.total else 1.0)
+
+            for i in range(0, len(queries), self.batch_size):
+                if time.monotonic() > deadline:
+                    self.status = "timed_out"
+                    break
+                batch = queries[i:i + self.batch_size]
+                await inference_scheduler.run(INTERACTIVE, embedding.warm_query_vectors, batch)
+                self._advance(len(batch), "embed")
+
+            if replay and self.status == "running":
+                for entry in entries:
+                    if time.monotonic() > deadline:
+                        self.status = "timed_out"
+                        break
+                    await search(entry)
+                    self._advance(1, "search")
+
+            if self.status == "running":
+                self.status = "done"
+        except Exception as e:
+            self.status = "failed"
+            logger.error(f"Query warm-up failed: {e}")
+        logger.info(
+            f"Query warm-up {self.status}: {self.completed}/{self.total} in {time.monotonic() - start:.1f}s"
+        )
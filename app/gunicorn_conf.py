@@ -0,0 +1,49 @@
+# Gunicorn config: load the embedding model once in the master, then fork
+# workers so they share its weights copy-on-write instead of each loading a copy.
+#
+#   gunicorn -c app/gunicorn_conf.py app.main:app
+#
+# Worker count comes from WEB_CONCURRENCY (Gunicorn's own default).
+import gc
+import os
+
+from app.core.config import settings
+from app.core.memory import format_memory_usage
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = True
+timeout = 120
+
+# torch's intra-op thread count, restored in each worker after fork
+_torch_threads = None
+
+def on_starting(server):
+    global _torch_threads
+    if not settings.PRELOAD_MODEL:
+        return
+    import torch
+    from app.core.embedding import get_embedding_service
+    # Loading copies tensors with intra-op parallelism, which would start torch's
+    # OpenMP pool in the master; that pool does not survive fork and workers can
+    # hang on their first forward pass. Load single-threaded, restore in post_fork.
+    _torch_threads = torch.get_num_threads()
+    torch.set_num_threads(1)
+    get_embedding_service()
+    # Move everything allocated so far out of GC tracking so collections in
+    # workers don't write to (and un-share) the inherited pages
+    gc.freeze()
+    server.log.info(f"Embedding model preloaded in master: {format_memory_usage()}")
+
+def post_fork(server, worker):
+    if _torch_threads is not None:
+        import torch
+        torch.set_num_threads(_torch_threads)
+
+def post_worker_init(worker):
+    worker.log.info(f"Worker started: {format_memory_usage()}")
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -1,10 +1,68 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from app.api.router import api_router
+from app.api.endpoints.admin import profile_store
+from app.core.config import settings
+from app.core.deadline import DeadlineMiddleware
+from app.core.embedding import get_embedding_service, is_embedding_model_loaded, preload_embedding_model
+from app.core.health import health_monitor
+from app.core.memory import format_memory_usage
+from app.core.metrics import MetricsMiddleware, metrics_response
+from app.core.profiling import ProfilingMiddleware
+from app.core.vector_database import get_qdrant_client
+from app.features.search.repository import SearchRepository
+from app.features.search.service import SearchService, local_replica
+import logging
+
+logger = logging.getLogger(__name__)
+
+async def warm_up():
+    await preload_embedding_model()
+    if not is_embedding_model_loaded():
+        return
+    service = SearchService(
+        repository=SearchRepository(client=get_qdrant_client()),
+        embedding=get_embedding_service()
+    )
+    await service.warm_up()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    health_monitor.start()
+    local_replica.start()
+    # Load the model and replay top queries in the background; /health/ready waits for both
+    model_task = asyncio.create_task(warm_up())
+    logger.info(f"Worker memory at startup: {format_memory_usage()}")
+    yield
+    model_task.cancel()
+    await local_replica.stop()
+    await health_monitor.stop()
 
 app = FastAPI(
     title="AI Inference Service",
     description="AI Microservice for Passion Tree - Topic Analysis, Sentiment Analysis, and Recommendations",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+app.add_middleware(
+    DeadlineMiddleware,
+    header=settings.DEADLINE_HEADER,
+    default_ms=settings.DEADLINE_DEFAULT_MS,
+    route_ms=settings.DEADLINE_ROUTE_MS,
+    max_ms=settings.DEADLINE_MAX_MS
+)
+app.add_middleware(
+    ProfilingMiddleware,
+    store=profile_store,
+    sample_rate=settings.PROFILE_SAMPLE_RATE,
+    header=settings.PROFILE_HEADER
+)
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(api_router, prefix="/api/v1")
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return metrics_response()
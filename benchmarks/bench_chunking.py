@@ -0,0 +1,92 @@
+"""Ingestion cost and search latency of the chunking modes vs single-vector.
+
+Embeds the same synthetic learning paths (with descriptions longer than the
+model window) in "single", "pooled" and "multivector" mode into in-memory
+Qdrant collections, then runs the same queries against each.
+
+Usage: python -m benchmarks.bench_chunking [--paths N] [--description-words N]
+"""
+import argparse
+import random
+import time
+
+from benchmarks.common import measure, random_text, summarize, write_results
+from benchmarks.stubs import install_local_backends
+
+from app.core.embedding import get_embedding_service
+from app.core.vector_database import create_collection_if_not_exists
+from app.features.search.repository import SearchRepository
+
+MODES = ("single", "pooled", "multivector")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--paths", type=int, default=200)
+    parser.add_argument("--description-words", type=int, default=600)
+    parser.add_argument("--chunk-tokens", type=int, default=160)
+    parser.add_argument("--chunk-overlap", type=int, default=32)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    qdrant, _ = install_local_backends()
+    embedding = get_embedding_service()
+    repository = SearchRepository(client=qdrant)
+
+    paths = [
+        (random_text(rng, 5), random_text(rng, rng.randint(args.description_words // 2, args.description_words)))
+        for _ in range(args.paths)
+    ]
+    queries = [random_text(rng, rng.randint(2, 8)) for _ in range(args.queries)]
+    query_vectors = embedding.generate_vectors(queries)
+    chunk_counts = [
+        len(embedding.chunk_text(description, args.chunk_tokens, args.chunk_overlap))
+        for _, description in paths
+    ]
+
+    results = {
+        "chunks_per_path": {
+            "mean": sum(chunk_counts) / len(chunk_counts),
+            "max": max(chunk_counts),
+        }
+    }
+    for mode in MODES:
+        collection = f"bench_{mode}"
+        multivector = mode == "multivector"
+        create_collection_if_not_exists(collection, vector_size=384, multivector=multivector)
+
+        start = time.perf_counter()
+        vectors = embedding.get_path_vectors(
+            paths, mode=mode, chunk_tokens=args.chunk_tokens, overlap=args.chunk_overlap
+        )
+        encoded = time.perf_counter()
+        repository.upsert_points(
+            collection,
+            point_ids=list(range(1, len(paths) + 1)),
+            vectors=vectors,
+            payloads=[{"title": title, "description": description} for title, description in paths]
+        )
+        upserted = time.perf_counter()
+
+        latencies = []
+        for vector in query_vectors:
+            query_start = time.perf_counter()
+            repository.search(collection, vector, top_k=7, multivector=multivector)
+            latencies.append(time.perf_counter() - query_start)
+
+        results[mode] = {
+            "ingest_encode_s": encoded - start,
+            "ingest_upsert_s": upserted - encoded,
+            "paths_per_s": len(paths) / (upserted - start),
+            "search": summarize(latencies),
+        }
+
+    # Encoding a single query is the same in every mode; reported for scale
+    results["query_encode"] = measure(lambda: embedding.generate_vector(queries[0]), iterations=50)
+    write_results("chunking", results, vars(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""End-to-end throughput/latency runs against local stand-ins.
+
+Runs /api/v1/search/sync/bulk, /api/v1/search/ and /api/v1/search/embed
+in-process through httpx's ASGI transport, with Qdrant in :memory: mode,
+fakeredis and a stub Groq server.
+
+The `search_*` cases repeat --distinct-queries queries, so most samples are
+served by the query-embedding cache and single-flight. `search_uncached_*`
+sends a query no earlier request used, so every sample pays for the encode
+and the Qdrant query; compare that case when judging search-path changes.
+
+Usage: python -m benchmarks.bench_e2e [--paths N] [--requests N] [--concurrency N]
+"""
+import argparse
+import asyncio
+import random
+import time
+
+import httpx
+
+from benchmarks.common import measure_concurrent, random_text, write_results
+from benchmarks.stubs import StubGroqServer, install_local_backends
+
+from app.core.embedding import get_embedding_service
+from app.core.network.groq_client import GroqClient
+from app.main import app
+
+COLLECTION = "learning_paths"
+
+
+def make_paths(rng: random.Random, count: int, start_id: int = 1):
+    return [
+        {
+            "path_id": start_id + i,
+            "title": random_text(rng, 5),
+            "description": random_text(rng, 60),
+            "metadata": {"category_id": rng.randint(1, 20), "difficulty": rng.choice(["beginner", "advanced"])},
+        }
+        for i in range(count)
+    ]
+
+
+async def run(args) -> dict:
+    rng = random.Random(args.seed)
+    install_local_backends()
+    # Load the shared model up front so runs measure request handling, not model loading
+    get_embedding_service()
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        (await client.post("/api/v1/search/init")).raise_for_status()
+
+        # Bulk sync: whole-request latency for fixed-size batches
+        batches = [make_paths(rng, args.bulk_batch, start_id=1 + i * args.bulk_batch)
+                   for i in range(max(1, args.paths // args.bulk_batch))]
+        start = time.perf_counter()
+        bulk = await measure_concurrent(
+            lambda i: client.post(
+                "/api/v1/search/sync/bulk",
+                json={"learning_paths": batches[i], "collection_name": COLLECTION}
+            ),
+            total=len(batches),
+            concurrency=1
+        )
+        elapsed = time.perf_counter() - start
+        bulk["paths_per_s"] = len(batches) * args.bulk_batch / elapsed
+        results["sync_bulk"] = bulk
+
+        queries = [random_text(rng, rng.randint(2, 8)) for _ in range(args.distinct_queries)]
+
+        async def search(i: int):
+            response = await client.post(
+                "/api/v1/search/",
+                json={"query": queries[i % len(queries)], "top_k": 7}
+            )
+            response.raise_for_status()
+
+        def uncached_search(concurrency: int):
+            # A unique token per request: never in the query cache, never coalesced
+            fresh = [f"{random_text(rng, rng.randint(2, 8))} q{concurrency}n{i}" for i in range(args.requests)]
+
+            async def search_uncached(i: int):
+                response = await client.post("/api/v1/search/", json={"query": fresh[i], "top_k": 7})
+                response.raise_for_status()
+            return search_uncached
+
+        async def search_filtered(i: int):
+            response = await client.post(
+                "/api/v1/search/",
+                json={"query": queries[i % len(queries)], "top_k": 7, "filters": {"category_id": 1 + i % 20}}
+            )
+            response.raise_for_status()
+
+        async def embed(i: int):
+            response = await client.post("/api/v1/search/embed", json={"text": queries[i % len(queries)]})
+            response.raise_for_status()
+
+        for concurrency in args.concurrency:
+            results[f"search_c{concurrency}"] = await measure_concurrent(search, args.requests, concurrency)
+            results[f"search_uncached_c{concurrency}"] = await measure_concurrent(
+                uncached_search(concurrency), args.requests, concurrency
+            )
+            results[f"search_filtered_c{concurrency}"] = await measure_concurrent(search_filtered, args.requests, concurrency)
+            results[f"embed_c{concurrency}"] = await measure_concurrent(embed, args.requests, concurrency)
+
+    with StubGroqServer(latency_s=args.groq_latency) as stub:
+        groq = GroqClient()
+        groq.base_url = stub.base_url
+        results["groq_chat_completion"] = await measure_concurrent(
+            lambda i: groq.get_chat_completion(queries[i % len(queries)]),
+            total=args.requests,
+            concurrency=max(args.concurrency)
+        )
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--paths", type=int, default=500)
+    parser.add_argument("--bulk-batch", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--distinct-queries", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--groq-latency", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    write_results("e2e", results, vars(args))
+
+
+if __name__ == "__main__":
+    main()
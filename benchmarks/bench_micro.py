@@ -0,0 +1,87 @@
+"""Micro-benchmarks for embedding, filter building and result mapping.
+
+Usage: python -m benchmarks.bench_micro [--iterations N] [--batch-size N]
+"""
+import argparse
+import random
+
+from benchmarks.common import measure, random_text, write_results
+
+from qdrant_client.http import models
+
+from app.core.embedding import EmbeddingService
+from app.features.search.repository import SearchRepository
+
+
+def bench_encode(embedding: EmbeddingService, rng: random.Random, iterations: int, batch_size: int):
+    texts = [random_text(rng, 40) for _ in range(batch_size)]
+    single = measure(lambda: [embedding.generate_vector(t) for t in texts], iterations)
+    batch = measure(lambda: embedding.generate_vectors(texts, batch_size=batch_size), iterations)
+    return {
+        "batch_size": batch_size,
+        "single_loop": single,
+        "batched": batch,
+        "speedup_p50": single["p50_ms"] / batch["p50_ms"] if batch["p50_ms"] else None,
+    }
+
+
+def bench_build_filters(repository: SearchRepository, iterations: int):
+    cases = {
+        "none": None,
+        "match_1": {"category_id": 10},
+        "match_3_range_1": {
+            "category_id": 10,
+            "difficulty": "beginner",
+            "is_active": True,
+            "duration": {"gte": 1, "lte": 40},
+        },
+    }
+    return {
+        name: measure(lambda f=filters: repository._build_filters(f), iterations)
+        for name, filters in cases.items()
+    }
+
+
+def bench_map_results(repository: SearchRepository, rng: random.Random, iterations: int):
+    results = {}
+    for top_k in (7, 20):
+        points = [
+            models.ScoredPoint(
+                id=i,
+                version=0,
+                score=rng.random(),
+                payload={
+                    "title": random_text(rng, 5),
+                    "description": random_text(rng, 200),
+                    "category_id": rng.randint(1, 20),
+                },
+            )
+            for i in range(top_k)
+        ]
+        results[f"top_{top_k}"] = measure(lambda p=points: repository._map_results(p), iterations)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--encode-iterations", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    embedding = EmbeddingService()
+    # _build_filters and _map_results never touch the client
+    repository = SearchRepository(client=None)
+
+    results = {
+        "encode": bench_encode(embedding, rng, args.encode_iterations, args.batch_size),
+        "build_filters": bench_build_filters(repository, args.iterations),
+        "map_results": bench_map_results(repository, rng, args.iterations),
+    }
+    write_results("micro", results, vars(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Import-time report and cold-start benchmark.
+
+Reports the slowest imports of `app.main` (via python -X importtime) and the
+time from process start until the server answers its first request
+(/api/v1/health/live) and, optionally, until it is ready (/api/v1/health/ready).
+
+Usage: python -m benchmarks.bench_startup [--runs N] [--target-ms MS] [--wait-ready] [--gunicorn]
+"""
+import argparse
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+from benchmarks.common import summarize, write_results
+
+ROOT = Path(__file__).resolve().parent.parent
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def import_time_report(top: int) -> dict:
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=ROOT,
+        env=os.environ.copy(),
+        capture_output=True,
+        text=True
+    )
+    wall = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise RuntimeError(f"import app.main failed:\n{completed.stderr[-2000:]}")
+
+    imports = []
+    for line in completed.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            imports.append({
+                "module": name,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+                "depth": (len(indent) - 1) // 2,
+            })
+    top_level = sorted(
+        (item for item in imports if item["depth"] == 0),
+        key=lambda item: item["cumulative_ms"],
+        reverse=True
+    )
+    return {
+        "process_wall_ms": wall * 1000,
+        "total_import_ms": sum(item["cumulative_ms"] for item in imports if item["depth"] == 0),
+        "heavy_modules_loaded": sorted({
+            item["module"].split(".")[0] for item in imports
+            if item["module"].split(".")[0] in ("torch", "sentence_transformers", "transformers")
+        }),
+        "top_level": top_level[:top],
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for(url: str, deadline: float) -> float:
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return time.perf_counter()
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.01)
+    raise TimeoutError(f"{url} did not return 200 in time")
+
+
+def cold_start(wait_ready: bool, gunicorn: bool, timeout: float) -> dict:
+    port = _free_port()
+    if gunicorn:
+        command = [sys.executable, "-m", "gunicorn", "-c", "app/gunicorn_conf.py",
+                   "--bind", f"127.0.0.1:{port}", "app.main:app"]
+    else:
+        command = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port)]
+
+    start = time.perf_counter()
+    process = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        base = f"http://127.0.0.1:{port}/api/v1"
+        live = _wait_for(f"{base}/health/live", start + timeout)
+        result = {"first_request_s": live - start}
+        if wait_ready:
+            ready = _wait_for(f"{base}/health/ready", start + timeout)
+            result["ready_s"] = ready - start
+        return result
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--target-ms", type=float, default=3000,
+                        help="Fail when the median time to first request exceeds this")
+    parser.add_argument("--wait-ready", action="store_true",
+                        help="Also wait for /health/ready (needs reachable Redis and Qdrant)")
+    parser.add_argument("--gunicorn", action="store_true", help="Start through app/gunicorn_conf.py")
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    runs = [cold_start(args.wait_ready, args.gunicorn, args.timeout) for _ in range(args.runs)]
+    results = {
+        "imports": import_time_report(args.top),
+        "first_request": summarize([run["first_request_s"] for run in runs]),
+    }
+    if args.wait_ready:
+        results["ready"] = summarize([run["ready_s"] for run in runs])
+    results["target_ms"] = args.target_ms
+    results["target_met"] = results["first_request"]["p50_ms"] <= args.target_ms
+
+    write_results("startup", results, vars(args))
+    if not results["target_met"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Compare two benchmark result files.
+
+Usage: python -m benchmarks.compare results/e2e-OLD.json results/e2e-NEW.json
+"""
+import argparse
+import json
+from typing import Any, Dict, Iterator, Tuple
+
+METRICS = ("p50_ms", "p95_ms", "p99_ms", "throughput_rps", "paths_per_s")
+
+
+def _flatten(node: Dict[str, Any], prefix: str = "") -> Iterator[Tuple[str, str, float]]:
+    for key, value in node.items():
+        if isinstance(value, dict):
+            yield from _flatten(value, f"{prefix}{key}.")
+        elif key in METRICS and isinstance(value, (int, float)):
+            yield prefix.rstrip("."), key, float(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    old = {(case, metric): value for case, metric, value in _flatten(baseline["results"])}
+    new = {(case, metric): value for case, metric, value in _flatten(candidate["results"])}
+
+    print(f"{baseline['git_revision']} -> {candidate['git_revision']}")
+    print(f"{'case':<40} {'metric':<16} {'baseline':>12} {'candidate':>12} {'change':>9}")
+    for key in sorted(old.keys() & new.keys()):
+        before, after = old[key], new[key]
+        change = (after - before) / before * 100 if before else 0.0
+        print(f"{key[0]:<40} {key[1]:<16} {before:>12.3f} {after:>12.3f} {change:>8.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Local stand-ins for Qdrant, Redis and Groq so benchmarks run offline."""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+
+import fakeredis
+from qdrant_client import QdrantClient
+
+import benchmarks.common  # noqa: F401  (sets QDRANT_URL before app modules load)
+import app.core.redis as redis_module
+import app.core.vector_database as vector_database
+
+
+def install_local_backends() -> Tuple[QdrantClient, fakeredis.FakeRedis]:
+    """Point the app's singleton clients at in-memory Qdrant and fakeredis."""
+    qdrant = QdrantClient(location=":memory:")
+    redis = fakeredis.FakeRedis(decode_responses=True)
+
+    vector_database.qdrant_client = qdrant
+    redis_module.redis_client = redis
+    return qdrant, redis
+
+
+class _GroqHandler(BaseHTTPRequestHandler):
+    latency_s = 0.0
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        time.sleep(self.latency_s)
+        body = json.dumps({
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "model": request.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "stub completion"},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 2, "total_tokens": 3},
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubGroqServer:
+    """OpenAI-compatible chat completions server with a fixed response latency."""
+
+    def __init__(self, latency_s: float = 0.05):
+        handler = type("Handler", (_GroqHandler,), {"latency_s": latency_s})
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address
+        return f"http://{host}:{port}/openai/v1"
+
+    def __enter__(self) -> "StubGroqServer":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,4 @@
+import os
+
+# Settings() requires QDRANT_URL at import; tests never reach a real Qdrant
+os.environ.setdefault("QDRANT_URL", "http://localhost:6333")
@@ -0,0 +1,143 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+from prometheus_client import REGISTRY
+
+from app.core import deadline
+from app.core.deadline import DeadlineMiddleware
+
+
+def counter_value(name, labels=None):
+    return REGISTRY.get_sample_value(name, labels or {}) or 0.0
+
+
+async def remaining_app(scope, receive, send):
+    body = json.dumps({"remaining": deadline.remaining()}).encode()
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def slow_app(scope, receive, send):
+    await asyncio.sleep(5)
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"late"})
+
+
+def make_middleware(app, default_ms=1000, route_ms=None, max_ms=5000, grace_ms=10):
+    return DeadlineMiddleware(
+        app,
+        header="X-Request-Timeout-Ms",
+        default_ms=default_ms,
+        route_ms=route_ms or {},
+        max_ms=max_ms,
+        grace_ms=grace_ms
+    )
+
+
+def get(app, path="/", headers=None):
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(path, headers=headers)
+    return asyncio.run(scenario())
+
+
+def test_budget_from_default_route_and_header():
+    app = make_middleware(remaining_app, default_ms=1000, route_ms={"/sync": 3000, "/sync/bulk": 4000}, max_ms=2000)
+    assert 0.9 < get(app, "/search").json()["remaining"] <= 1.0
+    # Longest matching prefix wins
+    assert 3.9 < get(app, "/sync/bulk").json()["remaining"] <= 4.0
+    assert 2.9 < get(app, "/sync/1").json()["remaining"] <= 3.0
+    assert get(app, headers={"X-Request-Timeout-Ms": "200"}).json()["remaining"] <= 0.2
+    # The header is capped at max_ms; garbage falls back to the route default
+    assert get(app, headers={"X-Request-Timeout-Ms": "60000"}).json()["remaining"] <= 2.0
+    assert 0.9 < get(app, headers={"X-Request-Timeout-Ms": "soon"}).json()["remaining"] <= 1.0
+
+
+def test_no_deadline_outside_requests():
+    assert deadline.remaining() is None
+    deadline.check("encode", 10)
+    assert deadline.timeout(30.0, "llm_call") == 30.0
+
+
+def test_check_and_timeout_use_the_remaining_budget():
+    async def scenario():
+        deadline.current_deadline.set(time.monotonic() + 0.5)
+        assert deadline.timeout(30.0, "llm_call") <= 0.5
+        before = counter_value("deadline_exceeded_total", {"stage": "encode"})
+        with pytest.raises(deadline.DeadlineExceeded):
+            deadline.check("encode", 1.0)
+        return counter_value("deadline_exceeded_total", {"stage": "encode"}) - before
+
+    assert asyncio.run(scenario()) == 1
+
+
+def test_overrunning_request_gets_504():
+    before = counter_value("deadline_exceeded_total", {"stage": "request"})
+    start = time.monotonic()
+    response = get(make_middleware(slow_app, default_ms=50))
+    assert time.monotonic() - start < 1
+    assert response.status_code == 504
+    assert response.json() == {"detail": "Request deadline exceeded"}
+    assert counter_value("deadline_exceeded_total", {"stage": "request"}) == before + 1
+
+
+def test_client_disconnect_cancels_the_request():
+    cancelled = asyncio.Event()
+    sent = []
+
+    async def app(scope, receive, send):
+        await receive()
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def scenario():
+        messages = [
+            {"type": "http.request", "body": b"{}", "more_body": False},
+            {"type": "http.disconnect"},
+        ]
+
+        async def receive():
+            message = messages.pop(0)
+            if message["type"] == "http.disconnect":
+                await asyncio.sleep(0.05)
+            return message
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "http", "method": "POST", "path": "/", "headers": []}
+        start = time.monotonic()
+        await make_middleware(app, default_ms=5000)(scope, receive, send)
+        return time.monotonic() - start
+
+    before = counter_value("client_disconnects_total")
+    elapsed = asyncio.run(scenario())
+    assert elapsed < 1
+    assert cancelled.is_set()
+    assert sent == []
+    assert counter_value("client_disconnects_total") == before + 1
+
+
+def test_app_errors_propagate():
+    async def failing_app(scope, receive, send):
+        raise RuntimeError("boom")
+
+    async def scenario():
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            pass
+
+        scope = {"type": "http", "method": "GET", "path": "/", "headers": []}
+        await make_middleware(failing_app)(scope, receive, send)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(scenario())
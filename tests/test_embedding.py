@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from app.core.embedding import EmbeddingService
+
+
+class WordTokenizer:
+    """One token per whitespace-separated word."""
+
+    def __init__(self):
+        self.vocab = {}
+        self.words = []
+
+    def __call__(self, text, add_special_tokens=False):
+        ids = []
+        for word in text.split():
+            if word not in self.vocab:
+                self.vocab[word] = len(self.words)
+                self.words.append(word)
+            ids.append(self.vocab[word])
+        return {"input_ids": ids}
+
+    def decode(self, ids):
+        return " ".join(self.words[i] for i in ids)
+
+
+class CountingModel:
+    """Deterministic stand-in for the SentenceTransformer: [words, chars, digits]."""
+
+    def __init__(self):
+        self.tokenizer = WordTokenizer()
+        self.calls = []
+
+    def encode(self, texts, batch_size=32):
+        self.calls.append(list(texts))
+        return np.array(
+            [[len(text.split()), len(text), sum(c.isdigit() for c in text)] for text in texts],
+            dtype=np.float32
+        )
+
+
+@pytest.fixture
+def service():
+    # Skip __init__: it loads the real model
+    service = EmbeddingService.__new__(EmbeddingService)
+    service.model = CountingModel()
+    service.query_cache_size = 0
+    return service
+
+
+def words(count, start=0):
+    return " ".join(f"w{i}" for i in range(start, start + count))
+
+
+def test_short_text_is_one_chunk(service):
+    assert service.chunk_text(words(5), chunk_tokens=10, overlap=2) == [words(5)]
+
+
+def test_chunks_overlap_and_cover_the_text(service):
+    chunks = service.chunk_text(words(10), chunk_tokens=4, overlap=1)
+    assert chunks == [words(4, 0), words(4, 3), words(4, 6)]
+    # The last window ends exactly at the end; no trailing duplicate chunk
+    assert service.chunk_text(words(7), chunk_tokens=4, overlap=1) == [words(4, 0), words(4, 3)]
+
+
+def test_overlap_not_smaller_than_window_still_advances(service):
+    chunks = service.chunk_text(words(3), chunk_tokens=2, overlap=5)
+    assert chunks == [words(2, 0), words(2, 1)]
+
+
+def test_single_mode_returns_one_vector_per_path(service):
+    vectors = service.get_path_vectors([("a", words(3)), ("b", words(50))], mode="single")
+    assert len(vectors) == 2
+    assert all(len(vector) == 3 for vector in vectors)
+
+
+def test_multivector_mode_returns_chunk_vectors_in_one_encode(service):
+    paths = [("a", words(10)), ("b", words(2))]
+    vectors = service.get_path_vectors(paths, mode="multivector", chunk_tokens=4, overlap=1)
+    assert [len(point) for point in vectors] == [3, 1]
+    # Chunks of every path go through the model together
+    assert len(service.model.calls) == 1
+    assert len(service.model.calls[0]) == 4
+    assert service.model.calls[0][0] == service.prepare_learning_path_text("a", words(4))
+
+
+def test_pooled_mode_is_normalized_mean_of_chunks(service):
+    paths = [("a", words(10)), ("b", words(2))]
+    chunked = service.get_path_vectors(paths, mode="multivector", chunk_tokens=4, overlap=1)
+    pooled = service.get_path_vectors(paths, mode="pooled", chunk_tokens=4, overlap=1)
+    for chunks, vector in zip(chunked, pooled):
+        expected = np.mean(chunks, axis=0)
+        expected /= np.linalg.norm(expected)
+        assert vector == pytest.approx(expected.tolist(), rel=1e-5)
+        assert np.linalg.norm(vector) == pytest.approx(1.0)
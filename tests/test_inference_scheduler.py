@@ -0,0 +1,102 @@
+import contextvars
+import threading
+import time
+
+import pytest
+
+from app.core import deadline
+from app.core.inference_scheduler import BULK, INTERACTIVE, InferenceScheduler
+
+request_id: contextvars.ContextVar = contextvars.ContextVar("request_id", default=None)
+
+
+def blocking_job(scheduler):
+    """Occupy the scheduler thread until the returned event is set."""
+    started = threading.Event()
+    release = threading.Event()
+
+    def block():
+        started.set()
+        release.wait(5)
+    future = scheduler.submit(INTERACTIVE, block)
+    assert started.wait(5)
+    return release, future
+
+
+def test_interactive_jobs_run_before_queued_bulk_jobs():
+    scheduler = InferenceScheduler()
+    order = []
+    release, first = blocking_job(scheduler)
+    futures = [
+        scheduler.submit(BULK, order.append, "bulk-1"),
+        scheduler.submit(BULK, order.append, "bulk-2"),
+        scheduler.submit(INTERACTIVE, order.append, "interactive"),
+    ]
+    assert scheduler.queue_depths() == {INTERACTIVE: 1, BULK: 2}
+    release.set()
+    for future in [first, *futures]:
+        future.result(5)
+    assert order == ["interactive", "bulk-1", "bulk-2"]
+
+
+def test_results_and_errors_reach_the_caller():
+    scheduler = InferenceScheduler()
+    assert scheduler.submit(INTERACTIVE, sum, [1, 2, 3]).result(5) == 6
+    with pytest.raises(ZeroDivisionError):
+        scheduler.submit(BULK, lambda: 1 / 0).result(5)
+
+
+def test_jobs_run_in_the_callers_context():
+    scheduler = InferenceScheduler()
+    request_id.set("req-1")
+    assert scheduler.submit(INTERACTIVE, request_id.get).result(5) == "req-1"
+
+
+def test_jobs_past_their_deadline_are_dropped():
+    scheduler = InferenceScheduler()
+    calls = []
+    release, first = blocking_job(scheduler)
+    token = deadline.current_deadline.set(time.monotonic() + 0.01)
+    try:
+        expired = scheduler.submit(INTERACTIVE, calls.append, "expired")
+    finally:
+        deadline.current_deadline.reset(token)
+    time.sleep(0.05)
+    release.set()
+    first.result(5)
+    with pytest.raises(deadline.DeadlineExceeded):
+        expired.result(5)
+    assert calls == []
+
+
+def run_bulk(scheduler, batches, duration):
+    start = time.monotonic()
+    futures = [scheduler.submit(BULK, time.sleep, duration) for _ in range(batches)]
+    for future in futures:
+        future.result(5)
+    return time.monotonic() - start
+
+
+def test_bulk_runs_unthrottled_without_interactive_traffic():
+    scheduler = InferenceScheduler(bulk_cpu_share=0.25)
+    # Each 50 ms batch would be followed by 150 ms idle if throttled
+    assert run_bulk(scheduler, 4, 0.05) < 0.4
+
+
+def test_bulk_is_throttled_while_interactive_traffic_competes():
+    scheduler = InferenceScheduler(bulk_cpu_share=0.5, contention_window=5)
+    scheduler.submit(INTERACTIVE, lambda: None).result(5)
+    # 3 batches of 50 ms with 50 ms idle after the first two
+    assert run_bulk(scheduler, 3, 0.05) >= 0.24
+
+
+def test_throttled_bulk_yields_to_new_interactive_work():
+    scheduler = InferenceScheduler(bulk_cpu_share=0.1, contention_window=5)
+    scheduler.submit(INTERACTIVE, lambda: None).result(5)
+    scheduler.submit(BULK, time.sleep, 0.05).result(5)
+    # Bulk now idles for ~450 ms; interactive work must not wait for that
+    waiting_bulk = scheduler.submit(BULK, lambda: None)
+    start = time.monotonic()
+    scheduler.submit(INTERACTIVE, lambda: None).result(5)
+    assert time.monotonic() - start < 0.2
+    waiting_bulk.result(5)
@@ -0,0 +1,169 @@
+import asyncio
+import json
+import time
+
+import fakeredis
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.core.rate_limit import RateLimiter, parse_rate
+
+
+CLIENT_KEYS = {"a": "secret-a", "b": "secret-b", "backend": "secret-backend"}
+
+
+def make_request(client_id=None, client_key=None, body=None, ip="10.0.0.1", path="/api/v1/search/"):
+    headers = [(b"content-type", b"application/json")]
+    if client_id is not None:
+        headers.append((b"x-client-id", client_id.encode()))
+        # Known clients authenticate unless a test passes its own key
+        key = client_key if client_key is not None else CLIENT_KEYS.get(client_id)
+        if key is not None:
+            headers.append((b"x-client-key", key.encode()))
+    payload = json.dumps(body).encode() if body is not None else b""
+
+    async def receive():
+        return {"type": "http.request", "body": payload, "more_body": False}
+
+    scope = {
+        "type": "http",
+        "method": "POST" if body is not None else "GET",
+        "path": path,
+        "headers": headers,
+        "query_string": b"",
+        "client": (ip, 1234),
+    }
+    return Request(scope, receive)
+
+
+def make_limiter(redis, default="2/minute", routes=None, keys=None):
+    return RateLimiter(
+        get_redis=lambda: redis,
+        enabled=True,
+        default_rate=default,
+        route_rates=routes or {},
+        key_rates=keys or {},
+        client_keys=CLIENT_KEYS
+    )
+
+
+def call(limiter, **request_kwargs):
+    """None when allowed, the HTTPException when rejected."""
+    try:
+        asyncio.run(limiter(make_request(**request_kwargs)))
+    except HTTPException as e:
+        return e
+    return None
+
+
+def test_parse_rate():
+    assert parse_rate("60/minute") == (60, 60)
+    assert parse_rate("5/seconds") == (5, 1)
+    assert parse_rate("100/day") == (100, 86400)
+
+
+def test_rejects_over_capacity_with_retry_after():
+    limiter = make_limiter(fakeredis.FakeRedis())
+    assert call(limiter, client_id="a") is None
+    assert call(limiter, client_id="a") is None
+    rejected = call(limiter, client_id="a")
+    assert rejected.status_code == 429
+    # 2/minute refills one token every 30 s
+    assert 29 <= int(rejected.headers["Retry-After"]) <= 30
+
+
+def test_tokens_refill_over_time():
+    limiter = make_limiter(fakeredis.FakeRedis(), default="10/second")
+    for _ in range(10):
+        assert call(limiter, client_id="a") is None
+    assert call(limiter, client_id="a") is not None
+    # Skip the locally cached rejection so the bucket itself is checked
+    limiter._blocked.clear()
+    time.sleep(0.25)
+    assert call(limiter, client_id="a") is None
+
+
+def test_rejected_bucket_is_cached_locally():
+    redis = fakeredis.FakeRedis()
+    limiter = make_limiter(redis, default="1/minute")
+    assert call(limiter, client_id="a") is None
+    assert call(limiter, client_id="a") is not None
+
+    def broken_redis():
+        raise ConnectionError("redis down")
+    limiter.get_redis = broken_redis
+    # Still rejected: Redis is not consulted (and would fail open if it were)
+    assert call(limiter, client_id="a").status_code == 429
+    assert call(limiter, client_id="b") is None
+
+
+def test_fails_open_when_redis_is_unavailable():
+    def broken_redis():
+        raise ConnectionError("redis down")
+    limiter = RateLimiter(broken_redis, True, "1/minute", {}, {})
+    for _ in range(3):
+        assert call(limiter, client_id="a") is None
+
+
+def test_clients_and_ips_have_separate_buckets():
+    limiter = make_limiter(fakeredis.FakeRedis(), default="1/minute")
+    assert call(limiter, client_id="a") is None
+    assert call(limiter, client_id="b") is None
+    assert call(limiter, ip="10.0.0.2") is None
+    assert call(limiter, client_id="a") is not None
+
+
+def test_client_limit_caps_all_of_its_users():
+    limiter = make_limiter(fakeredis.FakeRedis(), default="5/minute", keys={"client:backend": "3/minute"})
+    # Rotating user_id must not get a client past its own bucket
+    for user in range(3):
+        assert call(limiter, client_id="backend", body={"user_id": str(user)}) is None
+    assert call(limiter, client_id="backend", body={"user_id": "99"}) is not None
+
+
+def test_user_bucket_is_nested_in_client():
+    limiter = make_limiter(
+        fakeredis.FakeRedis(),
+        keys={"client:backend": "100/minute", "user:1": "1/minute"}
+    )
+    assert call(limiter, client_id="backend", body={"user_id": "1"}) is None
+    assert call(limiter, client_id="backend", body={"user_id": "1"}) is not None
+    # Other users of the same client are unaffected
+    assert call(limiter, client_id="backend", body={"user_id": "2"}) is None
+
+
+def test_rejection_does_not_consume_other_buckets():
+    redis = fakeredis.FakeRedis()
+    limiter = make_limiter(redis, keys={"client:backend": "3/minute", "user:1": "1/minute"})
+    assert call(limiter, client_id="backend", body={"user_id": "1"}) is None
+    # Rejected by the user bucket: the client bucket keeps its tokens
+    for _ in range(3):
+        assert call(limiter, client_id="backend", body={"user_id": "1"}) is not None
+    assert call(limiter, client_id="backend", body={"user_id": "2"}) is None
+    assert call(limiter, client_id="backend", body={"user_id": "3"}) is None
+
+
+def test_disabled_limiter_allows_everything():
+    limiter = RateLimiter(lambda: pytest.fail("Redis used while disabled"), False, "1/minute", {}, {})
+    for _ in range(3):
+        assert call(limiter, client_id="a") is None
+
+
+def test_unverified_client_ids_share_the_ip_bucket():
+    limiter = make_limiter(fakeredis.FakeRedis(), default="2/minute")
+    # A new X-Client-Id per request gets no fresh bucket
+    assert call(limiter, client_id="rotating-1") is None
+    assert call(limiter, client_id="rotating-2") is None
+    assert call(limiter, client_id="rotating-3").status_code == 429
+    # Other IPs are unaffected
+    assert call(limiter, client_id="rotating-4", ip="10.0.0.2") is None
+
+
+def test_spoofed_client_id_gets_no_override():
+    limiter = make_limiter(fakeredis.FakeRedis(), default="1/minute", keys={"client:backend": "100/minute"})
+    assert call(limiter, client_id="backend", client_key="guess") is None
+    assert call(limiter, client_id="backend", client_key="guess").status_code == 429
+    # The real backend, with its key, has its own bucket and limit
+    for _ in range(5):
+        assert call(limiter, client_id="backend") is None
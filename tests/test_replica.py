@@ -0,0 +1,138 @@
+import time
+
+import pytest
+from qdrant_client import QdrantClient, models
+
+from app.features.search.replica import LocalReplica, matches_filters
+
+COLLECTION = "learning_paths"
+
+POINTS = [
+    (1, [1.0, 0.0, 0.0], {"title": "python", "description": "long text", "category_id": 1, "hours": 10}),
+    (2, [0.8, 0.6, 0.0], {"title": "go", "description": "long text", "category_id": 2, "hours": 20}),
+    (3, [0.0, 1.0, 0.0], {"title": "rust", "description": "long text", "category_id": 1, "hours": 30}),
+    (4, [0.0, 0.0, 1.0], {"title": "sql", "description": "long text", "category_id": 3, "hours": 40}),
+]
+
+
+def make_client(multivector=False, points=POINTS):
+    client = QdrantClient(location=":memory:")
+    client.create_collection(
+        collection_name=COLLECTION,
+        vectors_config=models.VectorParams(
+            size=3,
+            distance=models.Distance.COSINE,
+            multivector_config=(
+                models.MultiVectorConfig(comparator=models.MultiVectorComparator.MAX_SIM)
+                if multivector else None
+            )
+        )
+    )
+    client.upsert(
+        collection_name=COLLECTION,
+        points=[models.PointStruct(id=pid, vector=vector, payload=payload) for pid, vector, payload in points]
+    )
+    return client
+
+
+def make_replica(tmp_path, client):
+    replica = LocalReplica(
+        enabled=True,
+        root=str(tmp_path),
+        collections=[COLLECTION],
+        refresh_interval=300,
+        excluded_fields=["description"],
+        get_client=lambda: client
+    )
+    replica.refresh(COLLECTION)
+    return replica
+
+
+@pytest.fixture
+def replica(tmp_path):
+    return make_replica(tmp_path, make_client())
+
+
+def ids(results):
+    return [result["id"] for result in results]
+
+
+def test_matches_filters():
+    payload = {"category_id": 1, "hours": 10, "tags": ["a", "b"], "flag": True}
+    assert matches_filters(payload, None)
+    assert matches_filters(payload, {"category_id": 1, "tags": "a"})
+    assert not matches_filters(payload, {"category_id": 2})
+    assert not matches_filters(payload, {"tags": "c"})
+    assert matches_filters(payload, {"hours": {"gte": 10, "lt": 11}})
+    assert not matches_filters(payload, {"hours": {"gt": 10}})
+    # Range conditions only match numbers, as in Qdrant
+    assert not matches_filters(payload, {"flag": {"gte": 0}})
+    assert not matches_filters({}, {"hours": {"lte": 100}})
+
+
+def test_search_ranks_by_cosine_similarity(replica):
+    results = replica.search(COLLECTION, [2.0, 0.1, 0.0], top_k=3)
+    assert ids(results) == [1, 2, 3]
+    assert results[0]["score"] == pytest.approx(0.99875, abs=1e-4)
+    assert replica.is_available(COLLECTION)
+
+
+def test_excluded_fields_and_payload_projection(replica):
+    result = replica.search(COLLECTION, [1.0, 0.0, 0.0], top_k=1)[0]
+    assert "description" not in result["payload"]
+    projected = replica.search(COLLECTION, [1.0, 0.0, 0.0], top_k=1, payload_fields=["title"])[0]
+    assert projected["payload"] == {"title": "python"}
+
+
+def test_filters_apply_to_snapshot(replica):
+    assert ids(replica.search(COLLECTION, [1.0, 0.0, 0.0], top_k=4, filters={"category_id": 1})) == [1, 3]
+    assert ids(replica.search(COLLECTION, [1.0, 0.0, 0.0], top_k=4, filters={"hours": {"gte": 20, "lte": 30}})) == [2, 3]
+    assert replica.search(COLLECTION, [1.0, 0.0, 0.0], top_k=4, filters={"category_id": 9}) == []
+
+
+def test_overlay_delete_hides_snapshot_point(replica):
+    replica.apply_delete(COLLECTION, 1)
+    assert ids(replica.search(COLLECTION, [1.0, 0.0, 0.0], top_k=2)) == [2, 3]
+
+
+def test_overlay_upsert_replaces_snapshot_point(replica):
+    replica.apply_upsert(COLLECTION, [4], [[1.0, 0.0, 0.0]], [{"title": "sql v2", "category_id": 3}])
+    replica.apply_upsert(COLLECTION, [5], [[0.9, 0.1, 0.0]], [{"title": "new", "category_id": 1}])
+    results = replica.search(COLLECTION, [1.0, 0.0, 0.0], top_k=3)
+    assert set(ids(results)[:2]) == {1, 4}
+    assert 5 in ids(results)
+    assert ids(replica.search(COLLECTION, [1.0, 0.0, 0.0], top_k=4, filters={"category_id": 3})) == [4]
+    # Overlay entries respect filters too
+    assert 5 not in ids(replica.search(COLLECTION, [1.0, 0.0, 0.0], top_k=5, filters={"category_id": 2}))
+
+
+def test_overlay_is_pruned_once_snapshot_includes_it(tmp_path):
+    client = make_client()
+    replica = make_replica(tmp_path, client)
+    replica.apply_upsert(COLLECTION, [5], [[0.0, 0.6, 0.8]], [{"title": "new"}])
+    client.upsert(COLLECTION, points=[models.PointStruct(id=5, vector=[0.0, 0.6, 0.8], payload={"title": "new"})])
+    # Versions have millisecond resolution; an entry from the build's own millisecond is kept
+    time.sleep(0.01)
+    replica.refresh_interval = 0
+    replica.refresh(COLLECTION)
+    assert replica._overlay[COLLECTION] == {}
+    assert ids(replica.search(COLLECTION, [0.0, 0.6, 0.8], top_k=1)) == [5]
+
+
+def test_multivector_points_score_by_best_chunk(tmp_path):
+    points = [
+        (1, [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]], {"title": "two chunks"}),
+        (2, [[0.6, 0.8, 0.0]], {"title": "one chunk"}),
+        (3, [[0.0, 0.0, 1.0], [0.0, 0.1, 1.0]], {"title": "off topic"}),
+    ]
+    replica = make_replica(tmp_path, make_client(multivector=True, points=points))
+    results = replica.search(COLLECTION, [0.0, 1.0, 0.0], top_k=3)
+    assert ids(results) == [1, 2, 3]
+    assert results[0]["score"] == pytest.approx(1.0)
+    assert results[1]["score"] == pytest.approx(0.8)
+
+
+def test_disabled_replica_ignores_writes(tmp_path):
+    replica = LocalReplica(False, str(tmp_path), [COLLECTION], 300, [], get_client=lambda: None)
+    replica.apply_upsert(COLLECTION, [1], [[1.0, 0.0, 0.0]], [{}])
+    assert not replica.is_available(COLLECTION)
@@ -0,0 +1,202 @@
+import asyncio
+import json
+import time
+
+import fakeredis
+import pytest
+
+from app.core import deadline
+from app.core.singleflight import SingleFlight, make_key
+
+
+class Counter:
+    def __init__(self, result="result", delay=0.05, error=None):
+        self.calls = 0
+        self.result = result
+        self.delay = delay
+        self.error = error
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def test_make_key_is_order_independent():
+    assert make_key("search", a=1, b={"x": 1, "y": 2}) == make_key("search", b={"y": 2, "x": 1}, a=1)
+    assert make_key("search", a=1) != make_key("search", a=2)
+
+
+def test_concurrent_calls_are_coalesced():
+    async def scenario():
+        flight = SingleFlight()
+        fn = Counter()
+        results = await asyncio.gather(*(flight.do("k", fn) for _ in range(5)))
+        return fn.calls, results, flight.in_flight()
+
+    calls, results, in_flight = asyncio.run(scenario())
+    assert calls == 1
+    assert results == ["result"] * 5
+    assert in_flight == 0
+
+
+def test_sequential_calls_are_not_cached():
+    async def scenario():
+        flight = SingleFlight()
+        fn = Counter(delay=0)
+        await flight.do("k", fn)
+        await flight.do("k", fn)
+        return fn.calls
+
+    assert asyncio.run(scenario()) == 2
+
+
+def test_error_is_shared_with_followers():
+    async def scenario():
+        flight = SingleFlight()
+        fn = Counter(error=ValueError("boom"))
+        results = await asyncio.gather(*(flight.do("k", fn) for _ in range(3)), return_exceptions=True)
+        return fn.calls, results
+
+    calls, results = asyncio.run(scenario())
+    assert calls == 1
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_cancelled_caller_does_not_cancel_shared_work():
+    async def scenario():
+        flight = SingleFlight()
+        fn = Counter(delay=0.1)
+        leader = asyncio.create_task(flight.do("k", fn))
+        follower = asyncio.create_task(flight.do("k", fn))
+        await asyncio.sleep(0.02)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return fn.calls, await follower
+
+    assert asyncio.run(scenario()) == (1, "result")
+
+
+def test_redis_lets_one_worker_compute_for_all():
+    redis = fakeredis.FakeRedis()
+
+    async def scenario():
+        # Two instances sharing Redis stand in for two workers
+        first = SingleFlight(get_redis=lambda: redis, poll_interval=0.01)
+        second = SingleFlight(get_redis=lambda: redis, poll_interval=0.01)
+        fn = Counter(result={"total": 1}, delay=0.2)
+        leader = asyncio.create_task(first.do("k", fn, dumps=json.dumps, loads=json.loads))
+        await asyncio.sleep(0.05)
+        follower = await second.do("k", fn, dumps=json.dumps, loads=json.loads)
+        return fn.calls, await leader, follower
+
+    calls, leader, follower = asyncio.run(scenario())
+    assert calls == 1
+    assert leader == follower == {"total": 1}
+
+
+def test_unavailable_redis_falls_back_to_local_computation():
+    def broken_redis():
+        raise ConnectionError("redis down")
+
+    async def scenario():
+        flight = SingleFlight(get_redis=broken_redis)
+        return await flight.do("k", Counter(delay=0), dumps=json.dumps, loads=json.loads)
+
+    assert asyncio.run(scenario()) == "result"
+
+
+async def call_with_budget(flight, fn, budget):
+    deadline.current_deadline.set(None if budget is None else time.monotonic() + budget)
+    return await flight.do("k", fn)
+
+
+def test_leader_deadline_does_not_apply_to_followers():
+    async def scenario():
+        flight = SingleFlight()
+        fn = Counter(delay=0.1)
+        return await asyncio.gather(
+            call_with_budget(flight, fn, 0.01),
+            call_with_budget(flight, fn, 10),
+            return_exceptions=True
+        )
+
+    leader, follower = asyncio.run(scenario())
+    assert isinstance(leader, deadline.DeadlineExceeded)
+    assert follower == "result"
+
+
+def test_flight_runs_under_latest_waiter_deadline():
+    async def remaining():
+        await asyncio.sleep(0.05)
+        return deadline.remaining()
+
+    async def scenario(second_budget):
+        flight = SingleFlight()
+        return await asyncio.gather(
+            call_with_budget(flight, remaining, 1),
+            call_with_budget(flight, remaining, second_budget)
+        )
+
+    first, second = asyncio.run(scenario(5))
+    assert first == second and 4 < first <= 5
+    # A waiter without a deadline lifts it for the shared work
+    assert asyncio.run(scenario(None)) == [None, None]
+
+
+def test_last_waiter_leaving_cancels_the_flight():
+    state = {"cancelled": False, "finished": False}
+
+    async def slow():
+        try:
+            await asyncio.sleep(0.3)
+            state["finished"] = True
+        except asyncio.CancelledError:
+            state["cancelled"] = True
+            raise
+
+    async def scenario():
+        flight = SingleFlight()
+        with pytest.raises(deadline.DeadlineExceeded):
+            await call_with_budget(flight, slow, 0.05)
+        await asyncio.sleep(0.01)
+        in_flight = flight.in_flight()
+        await asyncio.sleep(0.4)
+        return in_flight
+
+    assert asyncio.run(scenario()) == 0
+    assert state == {"cancelled": True, "finished": False}
+
+
+def test_disconnected_only_caller_cancels_the_flight():
+    async def scenario():
+        flight = SingleFlight()
+        fn = Counter(delay=5)
+        caller = asyncio.create_task(flight.do("k", fn))
+        await asyncio.sleep(0.02)
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        await asyncio.sleep(0.01)
+        return flight.in_flight()
+
+    assert asyncio.run(scenario()) == 0
+
+
+def test_flight_deadline_error_is_retried_with_remaining_budget():
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        if len(calls) == 1:
+            raise deadline.DeadlineExceeded("encode")
+        return "result"
+
+    async def scenario():
+        return await call_with_budget(SingleFlight(), fn, 10)
+
+    assert asyncio.run(scenario()) == "result"
+    assert len(calls) == 2
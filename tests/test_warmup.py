@@ -0,0 +1,152 @@
+import asyncio
+import time
+
+import fakeredis
+import pytest
+
+from app.features.search.warmup import QueryLog, QueryWarmup
+
+
+def make_log(max_entries=100, sample_rate=1.0):
+    redis = fakeredis.FakeRedis()
+    return QueryLog(lambda: redis, sample_rate=sample_rate, max_entries=max_entries, half_life=3600), redis
+
+
+def scores(log, redis):
+    return {member.decode(): score for member, score in redis.zrange(log.KEY, 0, -1, withscores=True)}
+
+
+def entry(query):
+    return {"query": query, "top_k": 7}
+
+
+def member(query):
+    return '{"query":"%s","top_k":7}' % query
+
+
+class FakeEmbedding:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.batches = []
+
+    def warm_query_vectors(self, texts):
+        time.sleep(self.delay)
+        self.batches.append(list(texts))
+        return len(texts)
+
+
+def test_first_record_does_not_decay():
+    log, redis = make_log()
+    log.record(entry("python"))
+    assert scores(log, redis) == {member("python"): 1.0}
+    assert redis.ttl(log.DECAY_KEY) > 0
+
+
+def test_scores_halve_once_per_half_life():
+    log, redis = make_log()
+    log.record(entry("python"))
+    log.record(entry("python"))
+    log.record(entry("rust"))
+    assert scores(log, redis) == {member("python"): 2.0, member("rust"): 1.0}
+    # Half-life elapsed: the next record halves everything, its own increment included
+    redis.delete(log.DECAY_KEY)
+    log.record(entry("go"))
+    assert scores(log, redis) == {member("python"): 1.0, member("rust"): 0.5, member("go"): 0.5}
+    # Within the half-life nothing decays
+    log.record(entry("go"))
+    assert scores(log, redis)[member("go")] == 1.5
+
+
+def test_faded_entries_are_dropped():
+    log, redis = make_log()
+    log.record(entry("old"))
+    for _ in range(4):
+        redis.delete(log.DECAY_KEY)
+        log.record(entry("new"))
+    # 1 -> 0.5 -> 0.25 -> 0.125 -> 0.0625 (< MIN_SCORE)
+    assert member("old") not in scores(log, redis)
+
+
+def test_trims_to_cap_only_after_twice_the_cap():
+    log, redis = make_log(max_entries=3)
+    for _ in range(3):
+        log.record(entry("popular"))
+    for i in range(5):
+        log.record(entry(f"new{i}"))
+    # 6 entries: within the slack, new queries get a chance to build up counts
+    assert len(scores(log, redis)) == 6
+    log.record(entry("new5"))
+    kept = scores(log, redis)
+    assert len(kept) == 3
+    assert kept[member("popular")] == 3.0
+
+
+def test_top_returns_most_frequent_first():
+    log, _ = make_log()
+    for query, count in [("a", 1), ("b", 3), ("c", 2)]:
+        for _ in range(count):
+            log.record(entry(query))
+    assert [item["query"] for item in log.top(2)] == ["b", "c"]
+
+
+def test_unsampled_requests_are_not_recorded():
+    log, redis = make_log(sample_rate=0.0)
+
+    async def scenario():
+        log.maybe_record(entry("python"))
+        await asyncio.sleep(0.05)
+
+    asyncio.run(scenario())
+    assert scores(log, redis) == {}
+
+
+def make_warmup(log, enabled=True, batch_size=2, time_budget=5.0, replay_search=False):
+    return QueryWarmup(log, enabled, top_n=10, batch_size=batch_size, time_budget=time_budget, replay_search=replay_search)
+
+
+def test_disabled_warmup_is_skipped():
+    log, _ = make_log()
+    warmup = make_warmup(log, enabled=False)
+    asyncio.run(warmup.run(FakeEmbedding()))
+    assert warmup.status == "skipped" and warmup.finished
+
+
+def test_warmup_encodes_unique_queries_in_batches_and_replays_searches():
+    log, _ = make_log()
+    for query in ["a", "b", "c"]:
+        log.record(entry(query))
+    log.record({"query": "a", "top_k": 3})
+    embedding = FakeEmbedding()
+    replayed = []
+
+    async def search(item):
+        replayed.append(item)
+
+    warmup = make_warmup(log, replay_search=True)
+    assert not warmup.finished
+    asyncio.run(warmup.run(embedding, search=search))
+
+    assert warmup.status == "done" and warmup.finished
+    assert sorted(text for batch in embedding.batches for text in batch) == ["a", "b", "c"]
+    assert all(len(batch) <= 2 for batch in embedding.batches)
+    assert len(replayed) == 4
+    assert warmup.progress() == {"status": "done", "completed": 7, "total": 7}
+
+
+def test_warmup_stops_at_its_time_budget():
+    log, _ = make_log()
+    for i in range(10):
+        log.record(entry(f"q{i}"))
+    warmup = make_warmup(log, batch_size=1, time_budget=0.15)
+    asyncio.run(warmup.run(FakeEmbedding(delay=0.1)))
+    assert warmup.status == "timed_out" and warmup.finished
+    assert 0 < warmup.completed < warmup.total == 10
+
+
+def test_warmup_failure_still_finishes():
+    def broken_redis():
+        raise ConnectionError("redis down")
+    log = QueryLog(broken_redis, sample_rate=1.0, max_entries=10, half_life=3600)
+    warmup = make_warmup(log)
+    asyncio.run(warmup.run(FakeEmbedding()))
+    assert warmup.status == "failed" and warmup.finished